@@ -1,19 +1,32 @@
+import json
 from http import HTTPStatus
 from pprint import pprint
 
 import click
 from db.pg_db import db
-from db.redis_db import redis_db
-from flask import Blueprint, current_app, jsonify, redirect, request
-from flask_jwt_extended import (create_access_token, create_refresh_token,
-                                get_jwt, get_jwt_identity, jwt_required,
-                                verify_jwt_in_request)
-from flask_jwt_extended.exceptions import JWTExtendedException
-from jwt import InvalidTokenError
+from flask import (Blueprint, current_app, jsonify, redirect, request,
+                   stream_with_context)
+from flask_jwt_extended import get_jwt, get_jwt_identity
 from models.accounts import History, SocialAccount, User
-from schemas.accounts import (UserHistorySchema, UserLoginSchema,
+from schemas.accounts import (HistoryExportSchema, HistoryStatsSchema,
+                              UserHistorySchema, UserLoginSchema,
                               UserSchemaDetailed)
-from utils import OAuthSignIn, get_login_and_user_or_403, register_user
+from services.hashing import hashing_executor
+from services.history_export import EXPORT_FORMATS, export_history
+from services.history_partitions import (create_month_partitions,
+                                         drop_expired_partitions,
+                                         purge_default_partitions)
+from services.history_stats import default_period, get_stats, rebuild_stats
+from services.history_writer import history_writer
+from services.login_guard import login_guard
+from services.pagination import keyset_paginate
+from services.passwords import SCHEMES, autotune
+from services.request_context import get_request_context, jwt_required
+from services.revoked_tokens import revoked_tokens
+from services.tokens import create_tokens, revoke_family, rotate_tokens
+from services.user_cache import CachedUser, user_cache
+from utils import (OAuthSignIn, check_role, get_login_and_user_or_403,
+                   register_user)
 
 accounts = Blueprint('accounts', __name__)
 
@@ -26,6 +39,92 @@ def create_user(login, password):
     pprint(result[0].json)
 
 
+@accounts.cli.command("user_cache_stats")
+def user_cache_stats():
+    pprint(user_cache.get_stats())
+
+
+@accounts.cli.command("hashing_stats")
+def hashing_stats():
+    """Очередь, ожидание и отказы пула хеширования паролей по воркерам."""
+    pprint(hashing_executor.get_shared_stats())
+
+
+@accounts.cli.command("history_writer_stats")
+def history_writer_stats():
+    pprint(history_writer.get_shared_stats())
+
+
+@accounts.cli.command("maintain_history_partitions")
+@click.option("--ahead", type=int, default=None)
+@click.option("--retention", type=int, default=None)
+@click.option("--detach-only", is_flag=True)
+def maintain_history_partitions(ahead, retention, detach_only):
+    """Создает будущие месячные партиции истории входов и убирает старые."""
+    if ahead is None:
+        ahead = current_app.config['HISTORY_PARTITIONS_AHEAD']
+    if retention is None:
+        retention = current_app.config['HISTORY_RETENTION_MONTHS']
+    # Каждый шаг в своей транзакции: ошибка создания партиций не отменяет
+    # очистку старых, и наоборот
+    with db.engine.begin() as connection:
+        created = create_month_partitions(connection, ahead)
+    with db.engine.begin() as connection:
+        expired = drop_expired_partitions(connection, retention, detach_only)
+    purged = {}
+    if not detach_only:
+        with db.engine.begin() as connection:
+            purged = purge_default_partitions(connection, retention)
+    pprint({'created': created, 'expired': expired, 'purged': purged})
+
+
+@accounts.cli.command("export_history")
+@click.argument("output", type=click.File("w", encoding="utf-8"))
+@click.option("--format", "export_format", type=click.Choice(list(EXPORT_FORMATS)))
+@click.option("--user-id", default=None)
+@click.option("--date-from", type=click.DateTime(), default=None)
+@click.option("--date-to", type=click.DateTime(), default=None)
+def export_history_command(output, export_format, user_id, date_from, date_to):
+    """Выгружает историю входов в файл (- для stdout)."""
+    for chunk in export_history(
+        export_format or 'ndjson',
+        current_app.config['HISTORY_EXPORT_CHUNK_SIZE'],
+        user_id=user_id,
+        date_from=date_from,
+        date_to=date_to,
+    ):
+        output.write(chunk)
+
+
+@accounts.cli.command("rebuild_history_stats")
+@click.option("--date-from", type=click.DateTime(["%Y-%m-%d"]), default=None)
+@click.option("--date-to", type=click.DateTime(["%Y-%m-%d"]), default=None)
+def rebuild_history_stats(date_from, date_to):
+    """Пересчитывает дневные агрегаты истории за период [date-from, date-to)."""
+    default_from, default_to = default_period()
+    with db.engine.begin() as connection:
+        rebuild_stats(
+            connection,
+            date_from.date() if date_from else default_from,
+            date_to.date() if date_to else default_to,
+        )
+
+
+@accounts.cli.command("tune_password_hash")
+@click.option("--scheme", type=click.Choice(SCHEMES), default=None)
+@click.option("--target-ms", type=int, default=None)
+def tune_password_hash(scheme, target_ms):
+    """Подбирает параметры хеширования паролей под целевое время проверки."""
+    scheme = scheme or current_app.config['PASSWORD_HASH_SCHEME']
+    target_ms = target_ms or current_app.config['PASSWORD_HASH_TARGET_MS']
+    params, elapsed = autotune(
+        scheme, current_app.config['PASSWORD_HASH_PARAMS'][scheme], target_ms / 1000
+    )
+    print(f'{scheme}: проверка пароля {elapsed * 1000:.0f} мс')
+    print(f'PASSWORD_HASH_SCHEME={scheme}')
+    print(f"PASSWORD_HASH_PARAMS='{json.dumps({scheme: params})}'")
+
+
 @accounts.route('/register', methods=['POST'])
 def register():
     """register
@@ -57,7 +156,20 @@ def register():
     tags:
     - account
     """
-    return register_user(**request.get_json(), request_id=request.headers.get('X-Request-Id', None))
+    return register_user(**get_request_context().body, request_id=request.headers.get('X-Request-Id', None))
+
+
+def too_many_login_attempts(retry_after):
+    return (
+        jsonify(
+            {
+                'status': 'error',
+                'message': 'Слишком много неудачных попыток входа, попробуйте позже',
+            }
+        ),
+        HTTPStatus.TOO_MANY_REQUESTS,
+        {'Retry-After': str(retry_after)},
+    )
 
 
 @accounts.route('/login', methods=['POST'])
@@ -116,14 +228,22 @@ def sign_in():
 
 
     """
-    user_try = UserLoginSchema().load(request.get_json())
+    context = get_request_context()
+    user_try = UserLoginSchema().load(context.body)
     login_try = user_try['login']
     password_try = user_try['password']
+    # Заблокированные попытки отклоняем до вычисления хеша пароля
+    if retry_after := login_guard.get_retry_after(login_try, request.remote_addr):
+        return too_many_login_attempts(retry_after)
     user = User.query.filter_by(login=login_try).first()
     if user and user.check_password(password_try):
+        if db.session.is_modified(user):
+            # Хеш пароля пересчитан текущей схемой
+            db.session.commit()
+        login_guard.reset(login_try, request.remote_addr)
+        context.set_user(CachedUser.from_model(user))
         login = login_try
-        access_token = create_access_token(identity=login)
-        refresh_token = create_refresh_token(identity=login)
+        access_token, refresh_token = create_tokens(user)
 
         return (
             jsonify(
@@ -137,6 +257,7 @@ def sign_in():
             HTTPStatus.OK,
         )
 
+    login_guard.register_failure(login_try, request.remote_addr)
     return (
         jsonify(
             {
@@ -206,7 +327,7 @@ def account():
             HTTPStatus.OK,
         )
 
-    new_user_info = UserSchemaDetailed().load(request.get_json(), partial=True)
+    new_user_info = UserSchemaDetailed().load(get_request_context().body, partial=True)
 
     if new_login := new_user_info.get('login', None):
         if User.query.filter(User.login == new_login, User.id != user.id).first():
@@ -221,20 +342,23 @@ def account():
             )
 
     if new_password := new_user_info.pop('password', None):
-        user.set_password(new_password)
+        User.query.get(user.id).set_password(new_password)
 
     User.query.filter_by(id=user.id).update(new_user_info)
     db.session.commit()
-
-    return (
-        jsonify(
-            {
-                'status': 'success',
-                'message': f'Пользователь {login} успешно обновлен',
-            }
-        ),
-        HTTPStatus.OK,
-    )
+    user_cache.invalidate(user.id, user.login)
+
+    response = {
+        'status': 'success',
+        'message': f'Пользователь {login} успешно обновлен',
+    }
+    if new_password:
+        # Смена пароля завершает все сеансы, текущему выдаем новые токены
+        revoked_tokens.bump_generation(user.id)
+        response['access_token'], response['refresh_token'] = create_tokens(
+            user_cache.get_by_id(user.id)
+        )
+    return jsonify(response), HTTPStatus.OK
 
 
 @accounts.route('/user-history', methods=['GET'])
@@ -247,6 +371,19 @@ def get_user_history():
       summary: Get user history
       security:
         - jwt_access: []
+      parameters:
+        - name: cursor
+          in: query
+          description: next_cursor из предыдущей страницы
+          type: string
+        - name: count
+          in: query
+          description: размер страницы
+          type: integer
+        - name: with_total
+          in: query
+          description: посчитать общее число записей
+          type: boolean
     responses:
       200:
         description: Return login history
@@ -273,6 +410,10 @@ def get_user_history():
              type: "string"
            message:
              type: "string"
+           next_cursor:
+             type: "string"
+           total:
+             type: "integer"
            data:
              type: "object"
              properties:
@@ -288,23 +429,126 @@ def get_user_history():
                  format: "date"
     """
     login, user = get_login_and_user_or_403()
-    paginated_user_history = History.query.filter_by(user_id=user.id).paginate(
-        page=request.args.get('page'), per_page=request.args.get('count')
+    page = keyset_paginate(
+        History.query.filter_by(user_id=user.id),
+        (History.date, History.id),
+        descending=True,
     )
     return (
         jsonify(
             {
                 'status': 'success',
                 'message': f'История действий {login}',
-                'data': UserHistorySchema().dump(
-                    paginated_user_history.items, many=True
-                ),
+                'data': UserHistorySchema().dump(page.items, many=True),
+                **page.meta,
             }
         ),
         HTTPStatus.OK,
     )
 
 
+@accounts.route('/history/export', methods=['GET'])
+@jwt_required()
+@check_role(required_role='Admin')
+def history_export():
+    """history export
+    ---
+    get:
+      description: stream login history as NDJSON or CSV
+      summary: Export login history
+      security:
+        - jwt_access: []
+      parameters:
+        - name: user_id
+          in: query
+          type: string
+          format: uuid
+        - name: date_from
+          in: query
+          type: string
+          format: date-time
+        - name: date_to
+          in: query
+          type: string
+          format: date-time
+        - name: format
+          in: query
+          type: string
+          enum: [ndjson, csv]
+    responses:
+      200:
+        description: Chunked NDJSON or CSV
+      403:
+        description: Forbidden error
+        schema:
+          $ref: "#/definitions/ApiResponse"
+    tags:
+      - account
+    """
+    params = HistoryExportSchema().load(request.args)
+    export_format = params.pop('format')
+    # Строки уходят клиенту пачками по мере чтения курсора
+    chunks = export_history(
+        export_format, current_app.config['HISTORY_EXPORT_CHUNK_SIZE'], **params
+    )
+    response = current_app.response_class(
+        stream_with_context(chunks), mimetype=EXPORT_FORMATS[export_format]
+    )
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename=history.{export_format}'
+    )
+    return response
+
+
+@accounts.route('/history/stats', methods=['GET'])
+@jwt_required()
+@check_role(required_role='Admin')
+def history_stats():
+    """history stats
+    ---
+    get:
+      description: daily history counts per device type and daily active users
+      summary: Login activity stats
+      security:
+        - jwt_access: []
+      parameters:
+        - name: user_id
+          in: query
+          description: дневная активность одного пользователя
+          type: string
+          format: uuid
+        - name: date_from
+          in: query
+          type: string
+          format: date
+        - name: date_to
+          in: query
+          description: не включительно
+          type: string
+          format: date
+    responses:
+      200:
+        description: Ok
+      403:
+        description: Forbidden error
+        schema:
+          $ref: "#/definitions/ApiResponse"
+    tags:
+      - account
+    """
+    params = HistoryStatsSchema().load(request.args)
+    default_from, default_to = default_period()
+    stats = get_stats(
+        params.get('date_from', default_from),
+        params.get('date_to', default_to),
+        user_id=params.get('user_id'),
+    )
+    return (
+        jsonify({'status': 'success', 'message': 'Статистика входов', 'data': stats}),
+        HTTPStatus.OK,
+    )
+
+
 @accounts.route('/refresh', methods=['POST'])
 @jwt_required(refresh=True)
 def refresh():
@@ -332,12 +576,23 @@ def refresh():
             type: "string"
           access_token:
             type: "string"
+          refresh_token:
+            type: "string"
 
     """
-    identity = get_jwt_identity()
-    jti = get_jwt()['jti']
-    redis_db.set(jti, '', ex=current_app.config['JWT_ACCESS_TOKEN_EXPIRES'])
-    access_token = create_access_token(identity=identity)
+    login, user = get_login_and_user_or_403()
+    tokens = rotate_tokens(user, get_jwt())
+    if not tokens:
+        return (
+            jsonify(
+                {
+                    'status': 'error',
+                    'message': 'Refresh token уже использован, сеанс завершен',
+                }
+            ),
+            HTTPStatus.UNAUTHORIZED,
+        )
+    access_token, refresh_token = tokens
 
     return (
         jsonify(
@@ -345,6 +600,7 @@ def refresh():
                 'status': 'success',
                 'message': 'Token успешно обновлен',
                 'access_token': access_token,
+                'refresh_token': refresh_token,
             }
         ),
         HTTPStatus.OK,
@@ -354,8 +610,7 @@ def refresh():
 @accounts.route('/unpin/<provider>')
 @jwt_required()
 def oauth_unpin(provider):
-    login = get_jwt_identity()
-    user = User.query.filter_by(login=login).first()
+    user = get_request_context().user
     if not user:
         return (
             jsonify(
@@ -379,7 +634,7 @@ def oauth_unpin(provider):
             ),
             HTTPStatus.NOT_FOUND,
         )
-    db.session.remove(social_account)
+    db.session.delete(social_account)
     db.session.commit()
     return (
         jsonify(
@@ -421,8 +676,7 @@ def oauth_callback(provider):
     user = SocialAccount.get_or_create_user(
         social_id=social_id, social_name=provider, username=username, email=email
     )
-    access_token = create_access_token(identity=user.login)
-    refresh_token = create_refresh_token(identity=user.login)
+    access_token, refresh_token = create_tokens(user)
     return (
         jsonify(
             {
@@ -465,8 +719,10 @@ def logout():
            type: "string"
     """
     login = get_jwt_identity()
-    jti = get_jwt()['jti']
-    redis_db.set(jti, '', ex=current_app.config['JWT_ACCESS_TOKEN_EXPIRES'])
+    token = get_jwt()
+    revoked_tokens.revoke(token['jti'], token['exp'])
+    if family := token.get('fam'):
+        revoke_family(family)
     return (
         jsonify(
             {
@@ -478,31 +734,59 @@ def logout():
     )
 
 
+@accounts.route('/logout-all', methods=['POST'])
+@jwt_required()
+def logout_all():
+    """User logout from all devices
+    ---
+    post:
+      description: user_logout_all
+      summary: Revoke all user tokens
+      security:
+        - jwt_access: []
+    responses:
+      '200':
+        description: Logout complete
+        schema:
+          $ref: "#/definitions/ApiResponse"
+    tags:
+      - account
+    definitions:
+      ApiResponse:
+        type: "object"
+        properties:
+          message:
+           type: "string"
+          status:
+           type: "string"
+    """
+    login, user = get_login_and_user_or_403()
+    revoked_tokens.bump_generation(user.id)
+    return (
+        jsonify(
+            {
+                'status': 'success',
+                'message': f'Все сеансы пользователя {login} завершены',
+            }
+        ),
+        HTTPStatus.OK,
+    )
+
+
 @accounts.after_request
 def after_request_func(response):
     if request.path.endswith('register'):
         return response
-    data = request.get_json() or {}
-    login = data.get('login', None)
-    if not login:
-        try:
-            verify_jwt_in_request()
-        except InvalidTokenError:
-            return response
-        login = get_jwt_identity()
-    user = User.query.filter_by(login=login).first()
+    user = get_request_context().user
     if user:
         user_device = request.headers.get("User-Device")
         if user_device:
             if user_device in ['smart', 'web', 'mobile']:
-                history = UserHistorySchema().load(
-                    {
-                        "user_id": str(user.id),
-                        "user_agent": str(request.user_agent),
-                        "info": f"{request.method} {request.path}",
-                        "user_device_type": request.headers.get("User-Device"),
-                    }
+                # Запись в БД делает фоновый поток воркера пачками
+                history_writer.add(
+                    user_id=str(user.id),
+                    user_agent=str(request.user_agent),
+                    info=f"{request.method} {request.path}",
+                    user_device_type=user_device,
                 )
-                db.session.add(history)
-                db.session.commit()
     return response
@@ -0,0 +1,43 @@
+import os
+from datetime import datetime
+
+from flask import Blueprint, current_app, request
+from services.signing_keys import generate_private_key, signing_keys
+
+jwks = Blueprint('jwks', __name__)
+
+
+@jwks.cli.command("generate_key")
+def generate_key():
+    directory = current_app.config['JWT_SIGNING_KEYS_DIR']
+    os.makedirs(directory, exist_ok=True)
+    kid = datetime.utcnow().strftime('%Y%m%d%H%M%S')
+    path = os.path.join(directory, f'{kid}.pem')
+    with open(path, 'wb') as key_file:
+        key_file.write(generate_private_key(current_app.config['JWT_ALGORITHM']))
+    os.chmod(path, 0o600)
+    print(f'Ключ {kid} сохранен в {path}')
+
+
+@jwks.route('/.well-known/jwks.json', methods=['GET'])
+def jwks_json():
+    """jwks
+    ---
+    get:
+      description: public keys for offline token verification
+      summary: JSON Web Key Set
+    responses:
+      200:
+        description: Ok
+      304:
+        description: Not modified
+    tags:
+      - jwks
+    """
+    response = current_app.response_class(
+        signing_keys.jwks, mimetype='application/json'
+    )
+    response.set_etag(signing_keys.etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = current_app.config['JWKS_MAX_AGE']
+    return response.make_conditional(request)
@@ -1,13 +1,22 @@
 import json
 from http import HTTPStatus
+from pprint import pprint
 
 from db.pg_db import db
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import get_jwt_identity, jwt_required
+from flask_jwt_extended import get_jwt
 from models.accounts import User
 from models.rbac import Role
 from schemas.rbac import (RoleAssignSchema, RoleCreateSchema, RoleSchema,
                           RoleUpdateSchema)
+from services.auth_changes import ROLE_DELETED, ROLE_UPDATED, auth_changes
+from services.decision_cache import decision_cache
+from services.pagination import keyset_paginate
+from services.request_context import get_request_context, jwt_required
+from services.revoked_tokens import revoked_tokens
+from services.role_cache import role_cache
+from services.tokens import has_role
+from services.user_cache import user_cache
 from utils import check_role
 from werkzeug.exceptions import abort
 
@@ -24,6 +33,13 @@ def add_base_data():
             role_obj = Role(**role)
             db.session.add(role_obj)
         db.session.commit()
+        role_cache.bump()
+
+
+@rbac.cli.command("decision_cache_stats")
+def decision_cache_stats():
+    """Метрики кеша решений CheckRole по процессам gRPC сервера."""
+    pprint(decision_cache.get_shared_stats())
 
 
 @rbac.route('/check', methods=['GET'])
@@ -68,15 +84,14 @@ def role_check():
             ),
             HTTPStatus.BAD_REQUEST,
         )
-    login = get_jwt_identity()
-    if not User.check_role(login=login, required_role=required_role):
+    if not has_role(get_jwt(), required_role):
         abort(HTTPStatus.FORBIDDEN)
     return jsonify({"status": "success", "message": "Доступ разрешен"}), HTTPStatus.OK
 
 
 @rbac.route('/roles/<uuid:id>/assign', methods=['PUT'])
 @jwt_required()
-@check_role(required_role='admin')
+@check_role(required_role='Admin')
 def role_assign(id):
     """role assign
     ---
@@ -115,7 +130,7 @@ def role_assign(id):
             type: "string"
     """
 
-    role = Role.query.filter_by(id=id).first()
+    role = role_cache.get_by_id(id)
     if not role:
         return (
             jsonify(
@@ -127,11 +142,17 @@ def role_assign(id):
             HTTPStatus.NOT_FOUND,
         )
     if request.method == 'PUT':
-        assign_users = RoleAssignSchema().load(request.get_json())
-        User.query.filter(User.id.in_([assign_users.pop('users')])).update(
+        user_ids = RoleAssignSchema().load(get_request_context().body)['users']
+        users = User.query.with_entities(User.id, User.login).filter(
+            User.id.in_(user_ids)
+        ).all()
+        User.query.filter(User.id.in_(user_ids)).update(
             {'role_id': role.id}, synchronize_session=False
         )
         db.session.commit()
+        revoked_tokens.bump_versions(user_ids)
+        user_cache.invalidate_many(users)
+        auth_changes.publish_role_assigned(user_ids, role)
 
         return (
             jsonify({"status": "success", "message": "Роли обновлены"}),
@@ -141,13 +162,26 @@ def role_assign(id):
 
 @rbac.route('/roles', methods=['GET', 'POST'])
 @jwt_required()
-@check_role(required_role='admin')
+@check_role(required_role='Admin')
 def roles_list():
     """roles
     ---
     get:
       description: get roles
       summary: get roles
+      parameters:
+        - name: cursor
+          in: query
+          description: next_cursor из предыдущей страницы
+          type: string
+        - name: count
+          in: query
+          description: размер страницы
+          type: integer
+        - name: with_total
+          in: query
+          description: посчитать общее число ролей
+          type: boolean
     post:
       description: get roles
       summary: get roles
@@ -196,9 +230,10 @@ def roles_list():
 
     if request.method == 'POST':
 
-        role = RoleCreateSchema().load(request.get_json())
+        role = RoleCreateSchema().load(get_request_context().body)
         db.session.add(role)
         db.session.commit()
+        role_cache.bump()
         return (
             jsonify(
                 {
@@ -210,15 +245,14 @@ def roles_list():
             HTTPStatus.CREATED,
         )
     else:
-        paginated_roles = Role.query.paginate(
-            page=request.args.get('page'), per_page=request.args.get('count')
-        )
+        page = keyset_paginate(Role.query, (Role.name, Role.id))
         return (
             jsonify(
                 {
                     'status': 'success',
                     'message': 'Все роли',
-                    'data': RoleSchema().dump(paginated_roles.items, many=True),
+                    'data': RoleSchema().dump(page.items, many=True),
+                    **page.meta,
                 }
             ),
             HTTPStatus.OK,
@@ -227,7 +261,7 @@ def roles_list():
 
 @rbac.route('/roles/<uuid:id>', methods=['PUT', 'DELETE', 'GET'])
 @jwt_required()
-@check_role(required_role='admin')
+@check_role(required_role='Admin')
 def role_detail(id):
     """role
     ---
@@ -302,11 +336,12 @@ def role_detail(id):
             HTTPStatus.NOT_FOUND,
         )
     if request.method == 'PUT':
-        data = request.get_json()
-        data['id'] = id
-        role = RoleUpdateSchema().load(data)
+        role = RoleUpdateSchema().load({**get_request_context().body, 'id': id})
         db.session.add(role)
         db.session.commit()
+        role_cache.bump()
+        revoked_tokens.bump_versions(user.id for user in role.users)
+        auth_changes.publish(ROLE_UPDATED, role_id=role.id, role_name=role.name)
         return (
             jsonify(
                 {
@@ -318,8 +353,14 @@ def role_detail(id):
             HTTPStatus.OK,
         )
     elif request.method == 'DELETE':
+        users = [(user.id, user.login) for user in role.users]
+        role_name = role.name
         db.session.delete(role)
         db.session.commit()
+        role_cache.bump()
+        revoked_tokens.bump_versions(user_id for user_id, _ in users)
+        user_cache.invalidate_many(users)
+        auth_changes.publish(ROLE_DELETED, role_id=id, role_name=role_name)
         return (
             jsonify({"status": "success", "message": f"объект Role с id={id} удален"}),
             HTTPStatus.NO_CONTENT,
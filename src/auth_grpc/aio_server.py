@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from collections import deque
+from typing import List, Optional, Tuple
+
+import grpc
+from db.async_pg_db import create_async_db
+from flask import Config
+from redis.exceptions import RedisError
+from services.auth_changes import auth_changes, parse_id
+from services.revoked_tokens import revoked_tokens
+from services.user_filter import normalize_user_id, user_filter
+from sqlalchemy import text
+
+import auth_pb2
+import auth_pb2_grpc
+from changes import change_message, resync_message, start_watch
+from checks import lookup_checks, pending_logins, role_results
+
+logger = logging.getLogger(__name__)
+
+# Настройки для запуска процессов, приложение Flask создается уже в них
+config = Config(os.path.dirname(os.path.abspath(__file__)))
+config.from_object('core.config.BaseConfig')
+
+USER_ROLES_QUERY = text(
+    'SELECT "user".login, role.name FROM "user" '
+    'LEFT JOIN role ON role.id = "user".role_id '
+    'WHERE "user".login = ANY(:logins)'
+)
+USER_EXISTS_QUERY = text('SELECT 1 FROM "user" WHERE id = :id')
+
+
+class ChangesHub:
+    """
+    Один читатель журнала изменений на процесс: блокирующее чтение Redis
+    Stream идет в пуле потоков, новые события складываются в буфер
+    последних buffer_size событий, подписки WatchAuthChanges ждут их
+    в цикле событий.
+    """
+
+    def __init__(self, config):
+        self.batch_size = config['AUTH_CHANGES_BATCH_SIZE']
+        self.block_ms = config['AUTH_CHANGES_BLOCK_MS']
+        self.events = deque(maxlen=config['AUTH_CHANGES_BUFFER_SIZE'])
+        # Все события после floor есть в буфере
+        self.floor = '0-0'
+        self.last_id = '0-0'
+        self.condition = None
+        self.task = None
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.last_id = await loop.run_in_executor(None, auth_changes.last_id)
+        self.floor = self.last_id
+        self.condition = asyncio.Condition()
+        self.task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                events = await loop.run_in_executor(
+                    None, auth_changes.read, self.last_id, self.batch_size, self.block_ms
+                )
+            except RedisError:
+                logger.exception('Не удалось прочитать журнал изменений авторизации')
+                await asyncio.sleep(1)
+                continue
+            if not events:
+                continue
+            for event_id, fields in events:
+                if len(self.events) == self.events.maxlen:
+                    self.floor = self.events[0][1]
+                self.events.append((parse_id(event_id), event_id, fields))
+            self.last_id = events[-1][0]
+            async with self.condition:
+                self.condition.notify_all()
+
+    def events_after(self, offset: str) -> Optional[List[Tuple[str, dict]]]:
+        """События буфера строго после offset, None - их уже нет в буфере."""
+        position = parse_id(offset)
+        if position < parse_id(self.floor):
+            return None
+        events = []
+        for event_position, event_id, fields in reversed(self.events):
+            if event_position <= position:
+                break
+            events.append((event_id, fields))
+        events.reverse()
+        return events
+
+    async def wait(self, offset: str):
+        """Ждет событие новее offset."""
+        position = parse_id(offset)
+        async with self.condition:
+            await self.condition.wait_for(lambda: parse_id(self.last_id) > position)
+
+
+class AsyncCheckAuth(auth_pb2_grpc.AuthServicer):
+    """
+    Проверки ролей на asyncio: решения, которых нет в кеше, читают
+    пользователей и их роли одним запросом из пула asyncpg, контекст Flask
+    не создается. Редкие изменения (SetRole) выполняет синхронный CheckAuth
+    в пуле потоков.
+    """
+
+    def __init__(self, engine, sync_servicer, changes, config):
+        self.engine = engine
+        self.sync_servicer = sync_servicer
+        self.changes = changes
+        self.config = config
+
+    async def check_roles(self, checks) -> list:
+        if revoked_tokens.synced:
+            states = lookup_checks(checks)
+        else:
+            # Пока список отозванных не загружен, проверка отзыва идет
+            # в синхронный Redis - не в цикле событий
+            states = await asyncio.get_running_loop().run_in_executor(
+                None, lookup_checks, checks
+            )
+        role_names = {}
+        logins = pending_logins(states)
+        if logins:
+            async with self.engine.connect() as connection:
+                rows = await connection.execute(USER_ROLES_QUERY, {'logins': logins})
+                role_names = dict(rows.all())
+        return role_results(checks, states, role_names)
+
+    async def CheckRole(self, request, context):
+        return (await self.check_roles([request]))[0]
+
+    async def CheckRoleBatch(self, request, context):
+        return auth_pb2.CheckRoleBatchResponse(
+            results=await self.check_roles(request.checks)
+        )
+
+    async def CheckRoleStream(self, request_iterator, context):
+        async for request in request_iterator:
+            yield auth_pb2.CheckRoleBatchResponse(
+                results=await self.check_roles(request.checks)
+            )
+
+    async def CheckUserExists(self, request, context):
+        user_id = normalize_user_id(request.uuid)
+        if not user_id or user_filter.might_exist(user_id) is False:
+            return auth_pb2.CheckUserExistsResponse(result=False)
+        async with self.engine.connect() as connection:
+            row = (await connection.execute(USER_EXISTS_QUERY, {'id': user_id})).first()
+        return auth_pb2.CheckUserExistsResponse(result=row is not None)
+
+    async def WatchAuthChanges(self, request, context):
+        # Redis клиент синхронный: обращения к нему идут в пуле потоков,
+        # новые события подписки получают от общего читателя процесса
+        loop = asyncio.get_running_loop()
+        try:
+            offset, resync = await loop.run_in_executor(None, start_watch, request.offset)
+        except ValueError:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, 'Некорректный offset')
+        if resync:
+            yield resync_message(offset)
+        while True:
+            events = self.changes.events_after(offset)
+            if events is None:
+                # Подписка отстала от буфера - догоняет чтением потока, если
+                # нужные события в нем еще есть
+                if await loop.run_in_executor(None, auth_changes.is_trimmed, offset):
+                    offset = self.changes.last_id
+                    yield resync_message(offset)
+                    continue
+                events = await loop.run_in_executor(
+                    None, auth_changes.read,
+                    offset, self.config['AUTH_CHANGES_BATCH_SIZE'], None,
+                )
+            for offset, fields in events:
+                yield change_message(offset, fields)
+            if not events:
+                await self.changes.wait(offset)
+
+    async def SetRole(self, request, context):
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.sync_servicer.SetRole, request, context
+        )
+
+
+async def serve():
+    # Приложение Flask создается один раз при старте процесса: конфигурация,
+    # Redis, ключи подписи и кеш решений
+    from auth_check import CheckAuth, app
+
+    engine = create_async_db(app.config)
+    changes = ChangesHub(app.config)
+    await changes.start()
+    server = grpc.aio.server(
+        maximum_concurrent_rpcs=app.config['GRPC_MAX_CONCURRENT_RPCS'],
+        options=[
+            ('grpc.so_reuseport', 1),
+            ('grpc.max_send_message_length', app.config['GRPC_MAX_MESSAGE_LENGTH']),
+            ('grpc.max_receive_message_length', app.config['GRPC_MAX_MESSAGE_LENGTH']),
+        ],
+    )
+    auth_pb2_grpc.add_AuthServicer_to_server(
+        AsyncCheckAuth(engine, CheckAuth(), changes, app.config), server
+    )
+    server.add_insecure_port(f"[::]:{app.config['GRPC_PORT']}")
+    await server.start()
+    logger.info('gRPC aio сервер запущен в процессе %s', os.getpid())
+    try:
+        await server.wait_for_termination()
+    finally:
+        changes.stop()
+        await engine.dispose()
+
+
+def run_process():
+    asyncio.run(serve())
+
+
+def main():
+    """
+    Запускает GRPC_PROCESSES процессов, каждый слушает один и тот же порт
+    через SO_REUSEPORT, ядро распределяет соединения между ними. Процессы
+    создаются до инициализации gRPC, fork после нее не поддерживается.
+    """
+    processes = config['GRPC_PROCESSES'] or os.cpu_count()
+    if processes == 1:
+        run_process()
+        return
+    workers = [multiprocessing.Process(target=run_process) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
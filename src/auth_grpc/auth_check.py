@@ -1,36 +1,65 @@
+import threading
 from concurrent import futures
 
 import grpc
-import jwt
 from core.app import create_app
 from db.pg_db import db
 from models.accounts import User
-from models.rbac import Role
+from services.auth_changes import auth_changes
+from services.decision_cache import init_decision_cache
+from services.revoked_tokens import revoked_tokens
+from services.role_cache import role_cache
+from services.user_cache import user_cache
+from services.user_filter import (init_user_filter, normalize_user_id,
+                                  user_filter)
 
 import auth_pb2
 import auth_pb2_grpc
+from changes import change_message, resync_message, start_watch
+from checks import lookup_checks, pending_logins, role_results
 
 app = create_app()
+init_decision_cache(app)
+init_user_filter(app)
+user_filter.start()
+
+# Подписки на журнал изменений, каждая занимает поток пула до отключения
+sync_watchers = threading.BoundedSemaphore(app.config['AUTH_CHANGES_SYNC_WATCHERS'])
+
+
+def check_roles(checks) -> list:
+    """
+    Проверяет пачку CheckRoleRequest: решения, которых нет в кеше, требуют
+    пользователей - они читаются одним обращением к кешу (и одним запросом
+    IN для промахов), роли - из таблицы ролей в памяти. Ответы в порядке
+    запросов.
+    """
+    states = lookup_checks(checks)
+    users = user_cache.get_many_by_login(pending_logins(states))
+    role_names = {}
+    for login, user in users.items():
+        role = role_cache.get_by_id(user.role_id)
+        role_names[login] = role.name if role else None
+    return role_results(checks, states, role_names)
 
 
 class CheckAuth(auth_pb2_grpc.AuthServicer):
     def CheckRole(self, request, context):
 
         with app.app_context():
-            if not request.access_token or not request.roles:
-                return auth_pb2.CheckRoleResponse(result=False, status="Error")
-            decoded = jwt.decode(
-                request.access_token, options={"verify_signature": False}
-            )
-            login = decoded.get('sub', None)
-            if not login:
-                return auth_pb2.CheckRoleResponse(result=False, status="Error")
-            user = User.query.filter_by(login=login).first()
-            role = Role.query.filter_by(id=user.role_id).first()
-            if user and role and role.name in request.roles:
-                return auth_pb2.CheckRoleResponse(result=True, status="Success")
+            return check_roles([request])[0]
+
+    def CheckRoleBatch(self, request, context):
+
+        with app.app_context():
+            return auth_pb2.CheckRoleBatchResponse(results=check_roles(request.checks))
 
-            return auth_pb2.CheckRoleResponse(result=False, status="Success")
+    def CheckRoleStream(self, request_iterator, context):
+
+        for request in request_iterator:
+            with app.app_context():
+                results = check_roles(request.checks)
+            yield auth_pb2.CheckRoleBatchResponse(results=results)
 
     def SetRole(self, request, context):
 
@@ -38,20 +67,73 @@ class CheckAuth(auth_pb2_grpc.AuthServicer):
             user_id = request.uuid
             role_name = request.role
             if not user_id or not role_name:
-                return auth_pb2.CheckRoleResponse(result=False, status="Not found user or role")
+                return auth_pb2.SetRoleResponse(result=False, status="Not found user or role")
             user = User.query.filter_by(id=user_id).first()
-            role = Role.query.filter_by(name=user.role_name).first()
+            role = role_cache.get_by_name(role_name)
+            if not user or not role:
+                return auth_pb2.SetRoleResponse(result=False, status="Not found user or role")
             user.role_id = role.id
             db.session.commit()
-            if user and role and role.name in request.roles:
-                return auth_pb2.CheckRoleResponse(result=True, status="Success")
+            revoked_tokens.bump_versions([user.id])
+            user_cache.invalidate(user.id, user.login)
+            auth_changes.publish_role_assigned([user.id], role)
+            return auth_pb2.SetRoleResponse(result=True, status="Success")
+
+    def CheckUserExists(self, request, context):
+        user_id = normalize_user_id(request.uuid)
+        if not user_id or user_filter.might_exist(user_id) is False:
+            return auth_pb2.CheckUserExistsResponse(result=False)
+        with app.app_context():
+            exists = db.session.query(User.id).filter_by(id=user_id).first()
+            return auth_pb2.CheckUserExistsResponse(result=exists is not None)
+
+    def WatchAuthChanges(self, request, context):
+        """
+        Подписка занимает поток пула до отключения клиента. Чтобы подписки
+        не отнимали потоки у проверок, их не больше AUTH_CHANGES_SYNC_WATCHERS,
+        остальные получают RESOURCE_EXHAUSTED - для них есть aio_server.py.
+        """
+        if not sync_watchers.acquire(blocking=False):
+            context.abort(
+                grpc.StatusCode.RESOURCE_EXHAUSTED,
+                'Превышено число подписок на изменения, используйте aio сервер',
+            )
+        try:
+            try:
+                offset, resync = start_watch(request.offset)
+            except ValueError:
+                context.abort(grpc.StatusCode.INVALID_ARGUMENT, 'Некорректный offset')
+            if resync:
+                yield resync_message(offset)
+            while context.is_active():
+                # Пока клиент читал, поток мог обрезать непрочитанные события
+                if auth_changes.is_trimmed(offset):
+                    offset = auth_changes.last_id()
+                    yield resync_message(offset)
+                events = auth_changes.read(
+                    offset,
+                    app.config['AUTH_CHANGES_BATCH_SIZE'],
+                    app.config['AUTH_CHANGES_BLOCK_MS'],
+                )
+                for offset, fields in events:
+                    yield change_message(offset, fields)
+        finally:
+            sync_watchers.release()
+
 
-            return auth_pb2.CheckRoleResponse(result=False, status="Success")
+def grpc_options(config) -> list:
+    return [
+        ('grpc.max_send_message_length', config['GRPC_MAX_MESSAGE_LENGTH']),
+        ('grpc.max_receive_message_length', config['GRPC_MAX_MESSAGE_LENGTH']),
+    ]
 
 
 if __name__ == '__main__':
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=app.config['GRPC_SYNC_WORKERS']),
+        options=grpc_options(app.config),
+    )
     auth_pb2_grpc.add_AuthServicer_to_server(CheckAuth(), server)
-    server.add_insecure_port('[::]:50051')
+    server.add_insecure_port(f"[::]:{app.config['GRPC_PORT']}")
     server.start()
     server.wait_for_termination()
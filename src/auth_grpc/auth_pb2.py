@@ -19,11 +19,61 @@ DESCRIPTOR = _descriptor.FileDescriptor(
   syntax='proto3',
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_pb=b'\n\x14\x61uth_grpc/auth.proto\"7\n\x10\x43heckRoleRequest\x12\x14\n\x0c\x61\x63\x63\x65ss_token\x18\x01 \x01(\t\x12\r\n\x05roles\x18\x02 \x03(\t\"3\n\x11\x43heckRoleResponse\x12\x0e\n\x06result\x18\x01 \x01(\x08\x12\x0e\n\x06status\x18\x02 \x01(\t\",\n\x0eSetRoleRequest\x12\x0c\n\x04uuid\x18\x01 \x01(\t\x12\x0c\n\x04role\x18\x02 \x01(\t\"1\n\x0fSetRoleResponse\x12\x0e\n\x06result\x18\x01 \x01(\x08\x12\x0e\n\x06status\x18\x02 \x01(\t\"&\n\x16\x43heckUserExistsRequest\x12\x0c\n\x04uuid\x18\x01 \x01(\t\")\n\x17\x43heckUserExistsResponse\x12\x0e\n\x06result\x18\x01 \x01(\x08\x32\xb4\x01\n\x04\x41uth\x12\x34\n\tCheckRole\x12\x11.CheckRoleRequest\x1a\x12.CheckRoleResponse\"\x00\x12.\n\x07SetRole\x12\x0f.SetRoleRequest\x1a\x10.SetRoleResponse\"\x00\x12\x46\n\x0f\x43heckUserExists\x12\x17.CheckUserExistsRequest\x1a\x18.CheckUserExistsResponse\"\x00\x62\x06proto3'
+  serialized_pb=b'\n\x14\x61uth_grpc/auth.proto\"7\n\x10\x43heckRoleRequest\x12\x14\n\x0c\x61\x63\x63\x65ss_token\x18\x01 \x01(\t\x12\r\n\x05roles\x18\x02 \x03(\t\"3\n\x11\x43heckRoleResponse\x12\x0e\n\x06result\x18\x01 \x01(\x08\x12\x0e\n\x06status\x18\x02 \x01(\t\":\n\x15\x43heckRoleBatchRequest\x12!\n\x06\x63hecks\x18\x01 \x03(\x0b\x32\x11.CheckRoleRequest\"=\n\x16\x43heckRoleBatchResponse\x12#\n\x07results\x18\x01 \x03(\x0b\x32\x12.CheckRoleResponse\",\n\x0eSetRoleRequest\x12\x0c\n\x04uuid\x18\x01 \x01(\t\x12\x0c\n\x04role\x18\x02 \x01(\t\"1\n\x0fSetRoleResponse\x12\x0e\n\x06result\x18\x01 \x01(\x08\x12\x0e\n\x06status\x18\x02 \x01(\t\"&\n\x16\x43heckUserExistsRequest\x12\x0c\n\x04uuid\x18\x01 \x01(\t\")\n\x17\x43heckUserExistsResponse\x12\x0e\n\x06result\x18\x01 \x01(\x08\")\n\x17WatchAuthChangesRequest\x12\x0e\n\x06offset\x18\x01 \x01(\t\"\xa5\x02\n\nAuthChange\x12\x10\n\x08sequence\x18\x01 \x01(\t\x12\x1e\n\x04type\x18\x02 \x01(\x0e\x32\x10.AuthChange.Type\x12\x10\n\x08user_ids\x18\x03 \x03(\t\x12\x0f\n\x07role_id\x18\x04 \x01(\t\x12\x11\n\trole_name\x18\x05 \x01(\t\x12\x0b\n\x03jti\x18\x06 \x01(\t\x12\x0b\n\x03\x65xp\x18\x07 \x01(\x03\x12\x0f\n\x07\x63ounter\x18\x08 \x01(\x03\"\x83\x01\n\x04Type\x12\n\n\x06RESYNC\x10\x00\x12\x11\n\rROLE_ASSIGNED\x10\x01\x12\x10\n\x0cROLE_UPDATED\x10\x02\x12\x10\n\x0cROLE_DELETED\x10\x03\x12\x11\n\rTOKEN_REVOKED\x10\x04\x12\x10\n\x0cUSER_VERSION\x10\x05\x12\x13\n\x0fUSER_GENERATION\x10\x06\x32\x82\x03\n\x04\x41uth\x12\x34\n\tCheckRole\x12\x11.CheckRoleRequest\x1a\x12.CheckRoleResponse\"\x00\x12\x43\n\x0e\x43heckRoleBatch\x12\x16.CheckRoleBatchRequest\x1a\x17.CheckRoleBatchResponse\"\x00\x12H\n\x0f\x43heckRoleStream\x12\x16.CheckRoleBatchRequest\x1a\x17.CheckRoleBatchResponse\"\x00(\x01\x30\x01\x12.\n\x07SetRole\x12\x0f.SetRoleRequest\x1a\x10.SetRoleResponse\"\x00\x12\x46\n\x0f\x43heckUserExists\x12\x17.CheckUserExistsRequest\x1a\x18.CheckUserExistsResponse\"\x00\x12=\n\x10WatchAuthChanges\x12\x18.WatchAuthChangesRequest\x1a\x0b.AuthChange\"\x00\x30\x01\x62\x06proto3'
 )
 
 
 
+_AUTHCHANGE_TYPE = _descriptor.EnumDescriptor(
+  name='Type',
+  full_name='AuthChange.Type',
+  filename=None,
+  file=DESCRIPTOR,
+  create_key=_descriptor._internal_create_key,
+  values=[
+    _descriptor.EnumValueDescriptor(
+      name='RESYNC', index=0, number=0,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='ROLE_ASSIGNED', index=1, number=1,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='ROLE_UPDATED', index=2, number=2,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='ROLE_DELETED', index=3, number=3,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='TOKEN_REVOKED', index=4, number=4,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='USER_VERSION', index=5, number=5,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='USER_GENERATION', index=6, number=6,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+  ],
+  containing_type=None,
+  serialized_options=None,
+  serialized_start=643,
+  serialized_end=774,
+)
+_sym_db.RegisterEnumDescriptor(_AUTHCHANGE_TYPE)
+
 
 _CHECKROLEREQUEST = _descriptor.Descriptor(
   name='CheckRoleRequest',
@@ -103,6 +153,70 @@ _CHECKROLERESPONSE = _descriptor.Descriptor(
 )
 
 
+_CHECKROLEBATCHREQUEST = _descriptor.Descriptor(
+  name='CheckRoleBatchRequest',
+  full_name='CheckRoleBatchRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='checks', full_name='CheckRoleBatchRequest.checks', index=0,
+      number=1, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=134,
+  serialized_end=192,
+)
+
+
+_CHECKROLEBATCHRESPONSE = _descriptor.Descriptor(
+  name='CheckRoleBatchResponse',
+  full_name='CheckRoleBatchResponse',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='results', full_name='CheckRoleBatchResponse.results', index=0,
+      number=1, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=194,
+  serialized_end=255,
+)
+
+
 _SETROLEREQUEST = _descriptor.Descriptor(
   name='SetRoleRequest',
   full_name='SetRoleRequest',
@@ -137,8 +251,8 @@ _SETROLEREQUEST = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=134,
-  serialized_end=178,
+  serialized_start=257,
+  serialized_end=301,
 )
 
 
@@ -176,8 +290,8 @@ _SETROLERESPONSE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=180,
-  serialized_end=229,
+  serialized_start=303,
+  serialized_end=352,
 )
 
 
@@ -208,8 +322,8 @@ _CHECKUSEREXISTSREQUEST = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=231,
-  serialized_end=269,
+  serialized_start=354,
+  serialized_end=392,
 )
 
 
@@ -240,16 +354,138 @@ _CHECKUSEREXISTSRESPONSE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=271,
-  serialized_end=312,
+  serialized_start=394,
+  serialized_end=435,
+)
+
+
+_WATCHAUTHCHANGESREQUEST = _descriptor.Descriptor(
+  name='WatchAuthChangesRequest',
+  full_name='WatchAuthChangesRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='offset', full_name='WatchAuthChangesRequest.offset', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=437,
+  serialized_end=478,
 )
 
+
+_AUTHCHANGE = _descriptor.Descriptor(
+  name='AuthChange',
+  full_name='AuthChange',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='sequence', full_name='AuthChange.sequence', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='type', full_name='AuthChange.type', index=1,
+      number=2, type=14, cpp_type=8, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='user_ids', full_name='AuthChange.user_ids', index=2,
+      number=3, type=9, cpp_type=9, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='role_id', full_name='AuthChange.role_id', index=3,
+      number=4, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='role_name', full_name='AuthChange.role_name', index=4,
+      number=5, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='jti', full_name='AuthChange.jti', index=5,
+      number=6, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='exp', full_name='AuthChange.exp', index=6,
+      number=7, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='counter', full_name='AuthChange.counter', index=7,
+      number=8, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+    _AUTHCHANGE_TYPE,
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=481,
+  serialized_end=774,
+)
+
+_CHECKROLEBATCHREQUEST.fields_by_name['checks'].message_type = _CHECKROLEREQUEST
+_CHECKROLEBATCHRESPONSE.fields_by_name['results'].message_type = _CHECKROLERESPONSE
+_AUTHCHANGE.fields_by_name['type'].enum_type = _AUTHCHANGE_TYPE
+_AUTHCHANGE_TYPE.containing_type = _AUTHCHANGE
 DESCRIPTOR.message_types_by_name['CheckRoleRequest'] = _CHECKROLEREQUEST
 DESCRIPTOR.message_types_by_name['CheckRoleResponse'] = _CHECKROLERESPONSE
+DESCRIPTOR.message_types_by_name['CheckRoleBatchRequest'] = _CHECKROLEBATCHREQUEST
+DESCRIPTOR.message_types_by_name['CheckRoleBatchResponse'] = _CHECKROLEBATCHRESPONSE
 DESCRIPTOR.message_types_by_name['SetRoleRequest'] = _SETROLEREQUEST
 DESCRIPTOR.message_types_by_name['SetRoleResponse'] = _SETROLERESPONSE
 DESCRIPTOR.message_types_by_name['CheckUserExistsRequest'] = _CHECKUSEREXISTSREQUEST
 DESCRIPTOR.message_types_by_name['CheckUserExistsResponse'] = _CHECKUSEREXISTSRESPONSE
+DESCRIPTOR.message_types_by_name['WatchAuthChangesRequest'] = _WATCHAUTHCHANGESREQUEST
+DESCRIPTOR.message_types_by_name['AuthChange'] = _AUTHCHANGE
 _sym_db.RegisterFileDescriptor(DESCRIPTOR)
 
 CheckRoleRequest = _reflection.GeneratedProtocolMessageType('CheckRoleRequest', (_message.Message,), {
@@ -266,6 +502,20 @@ CheckRoleResponse = _reflection.GeneratedProtocolMessageType('CheckRoleResponse'
   })
 _sym_db.RegisterMessage(CheckRoleResponse)
 
+CheckRoleBatchRequest = _reflection.GeneratedProtocolMessageType('CheckRoleBatchRequest', (_message.Message,), {
+  'DESCRIPTOR' : _CHECKROLEBATCHREQUEST,
+  '__module__' : 'auth_grpc.auth_pb2'
+  # @@protoc_insertion_point(class_scope:CheckRoleBatchRequest)
+  })
+_sym_db.RegisterMessage(CheckRoleBatchRequest)
+
+CheckRoleBatchResponse = _reflection.GeneratedProtocolMessageType('CheckRoleBatchResponse', (_message.Message,), {
+  'DESCRIPTOR' : _CHECKROLEBATCHRESPONSE,
+  '__module__' : 'auth_grpc.auth_pb2'
+  # @@protoc_insertion_point(class_scope:CheckRoleBatchResponse)
+  })
+_sym_db.RegisterMessage(CheckRoleBatchResponse)
+
 SetRoleRequest = _reflection.GeneratedProtocolMessageType('SetRoleRequest', (_message.Message,), {
   'DESCRIPTOR' : _SETROLEREQUEST,
   '__module__' : 'auth_grpc.auth_pb2'
@@ -294,6 +544,20 @@ CheckUserExistsResponse = _reflection.GeneratedProtocolMessageType('CheckUserExi
   })
 _sym_db.RegisterMessage(CheckUserExistsResponse)
 
+WatchAuthChangesRequest = _reflection.GeneratedProtocolMessageType('WatchAuthChangesRequest', (_message.Message,), {
+  'DESCRIPTOR' : _WATCHAUTHCHANGESREQUEST,
+  '__module__' : 'auth_grpc.auth_pb2'
+  # @@protoc_insertion_point(class_scope:WatchAuthChangesRequest)
+  })
+_sym_db.RegisterMessage(WatchAuthChangesRequest)
+
+AuthChange = _reflection.GeneratedProtocolMessageType('AuthChange', (_message.Message,), {
+  'DESCRIPTOR' : _AUTHCHANGE,
+  '__module__' : 'auth_grpc.auth_pb2'
+  # @@protoc_insertion_point(class_scope:AuthChange)
+  })
+_sym_db.RegisterMessage(AuthChange)
+
 
 
 _AUTH = _descriptor.ServiceDescriptor(
@@ -303,8 +567,8 @@ _AUTH = _descriptor.ServiceDescriptor(
   index=0,
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_start=315,
-  serialized_end=495,
+  serialized_start=777,
+  serialized_end=1163,
   methods=[
   _descriptor.MethodDescriptor(
     name='CheckRole',
@@ -316,10 +580,30 @@ _AUTH = _descriptor.ServiceDescriptor(
     serialized_options=None,
     create_key=_descriptor._internal_create_key,
   ),
+  _descriptor.MethodDescriptor(
+    name='CheckRoleBatch',
+    full_name='Auth.CheckRoleBatch',
+    index=1,
+    containing_service=None,
+    input_type=_CHECKROLEBATCHREQUEST,
+    output_type=_CHECKROLEBATCHRESPONSE,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='CheckRoleStream',
+    full_name='Auth.CheckRoleStream',
+    index=2,
+    containing_service=None,
+    input_type=_CHECKROLEBATCHREQUEST,
+    output_type=_CHECKROLEBATCHRESPONSE,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
   _descriptor.MethodDescriptor(
     name='SetRole',
     full_name='Auth.SetRole',
-    index=1,
+    index=3,
     containing_service=None,
     input_type=_SETROLEREQUEST,
     output_type=_SETROLERESPONSE,
@@ -329,13 +613,23 @@ _AUTH = _descriptor.ServiceDescriptor(
   _descriptor.MethodDescriptor(
     name='CheckUserExists',
     full_name='Auth.CheckUserExists',
-    index=2,
+    index=4,
     containing_service=None,
     input_type=_CHECKUSEREXISTSREQUEST,
     output_type=_CHECKUSEREXISTSRESPONSE,
     serialized_options=None,
     create_key=_descriptor._internal_create_key,
   ),
+  _descriptor.MethodDescriptor(
+    name='WatchAuthChanges',
+    full_name='Auth.WatchAuthChanges',
+    index=5,
+    containing_service=None,
+    input_type=_WATCHAUTHCHANGESREQUEST,
+    output_type=_AUTHCHANGE,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
 ])
 _sym_db.RegisterServiceDescriptor(_AUTH)
 
@@ -19,6 +19,16 @@ class AuthStub(object):
                 request_serializer=auth__grpc_dot_auth__pb2.CheckRoleRequest.SerializeToString,
                 response_deserializer=auth__grpc_dot_auth__pb2.CheckRoleResponse.FromString,
                 )
+        self.CheckRoleBatch = channel.unary_unary(
+                '/Auth/CheckRoleBatch',
+                request_serializer=auth__grpc_dot_auth__pb2.CheckRoleBatchRequest.SerializeToString,
+                response_deserializer=auth__grpc_dot_auth__pb2.CheckRoleBatchResponse.FromString,
+                )
+        self.CheckRoleStream = channel.stream_stream(
+                '/Auth/CheckRoleStream',
+                request_serializer=auth__grpc_dot_auth__pb2.CheckRoleBatchRequest.SerializeToString,
+                response_deserializer=auth__grpc_dot_auth__pb2.CheckRoleBatchResponse.FromString,
+                )
         self.SetRole = channel.unary_unary(
                 '/Auth/SetRole',
                 request_serializer=auth__grpc_dot_auth__pb2.SetRoleRequest.SerializeToString,
@@ -29,6 +39,11 @@ class AuthStub(object):
                 request_serializer=auth__grpc_dot_auth__pb2.CheckUserExistsRequest.SerializeToString,
                 response_deserializer=auth__grpc_dot_auth__pb2.CheckUserExistsResponse.FromString,
                 )
+        self.WatchAuthChanges = channel.unary_stream(
+                '/Auth/WatchAuthChanges',
+                request_serializer=auth__grpc_dot_auth__pb2.WatchAuthChangesRequest.SerializeToString,
+                response_deserializer=auth__grpc_dot_auth__pb2.AuthChange.FromString,
+                )
 
 
 class AuthServicer(object):
@@ -40,6 +55,19 @@ class AuthServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def CheckRoleBatch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def CheckRoleStream(self, request_iterator, context):
+        """На каждую пачку в потоке приходит ответ с результатами в том же порядке
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def SetRole(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -52,6 +80,12 @@ class AuthServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def WatchAuthChanges(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_AuthServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -60,6 +94,16 @@ def add_AuthServicer_to_server(servicer, server):
                     request_deserializer=auth__grpc_dot_auth__pb2.CheckRoleRequest.FromString,
                     response_serializer=auth__grpc_dot_auth__pb2.CheckRoleResponse.SerializeToString,
             ),
+            'CheckRoleBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.CheckRoleBatch,
+                    request_deserializer=auth__grpc_dot_auth__pb2.CheckRoleBatchRequest.FromString,
+                    response_serializer=auth__grpc_dot_auth__pb2.CheckRoleBatchResponse.SerializeToString,
+            ),
+            'CheckRoleStream': grpc.stream_stream_rpc_method_handler(
+                    servicer.CheckRoleStream,
+                    request_deserializer=auth__grpc_dot_auth__pb2.CheckRoleBatchRequest.FromString,
+                    response_serializer=auth__grpc_dot_auth__pb2.CheckRoleBatchResponse.SerializeToString,
+            ),
             'SetRole': grpc.unary_unary_rpc_method_handler(
                     servicer.SetRole,
                     request_deserializer=auth__grpc_dot_auth__pb2.SetRoleRequest.FromString,
@@ -70,6 +114,11 @@ def add_AuthServicer_to_server(servicer, server):
                     request_deserializer=auth__grpc_dot_auth__pb2.CheckUserExistsRequest.FromString,
                     response_serializer=auth__grpc_dot_auth__pb2.CheckUserExistsResponse.SerializeToString,
             ),
+            'WatchAuthChanges': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchAuthChanges,
+                    request_deserializer=auth__grpc_dot_auth__pb2.WatchAuthChangesRequest.FromString,
+                    response_serializer=auth__grpc_dot_auth__pb2.AuthChange.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'Auth', rpc_method_handlers)
@@ -97,6 +146,40 @@ class Auth(object):
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
 
+    @staticmethod
+    def CheckRoleBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/Auth/CheckRoleBatch',
+            auth__grpc_dot_auth__pb2.CheckRoleBatchRequest.SerializeToString,
+            auth__grpc_dot_auth__pb2.CheckRoleBatchResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def CheckRoleStream(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(request_iterator, target, '/Auth/CheckRoleStream',
+            auth__grpc_dot_auth__pb2.CheckRoleBatchRequest.SerializeToString,
+            auth__grpc_dot_auth__pb2.CheckRoleBatchResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
     @staticmethod
     def SetRole(request,
             target,
@@ -130,3 +213,20 @@ class Auth(object):
             auth__grpc_dot_auth__pb2.CheckUserExistsResponse.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def WatchAuthChanges(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/Auth/WatchAuthChanges',
+            auth__grpc_dot_auth__pb2.WatchAuthChangesRequest.SerializeToString,
+            auth__grpc_dot_auth__pb2.AuthChange.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
@@ -0,0 +1,51 @@
+from typing import Tuple
+
+from services.auth_changes import (ROLE_ASSIGNED, ROLE_DELETED, ROLE_UPDATED,
+                                   TOKEN_REVOKED, USER_GENERATION,
+                                   USER_VERSION, auth_changes, parse_id)
+
+import auth_pb2
+
+CHANGE_TYPES = {
+    ROLE_ASSIGNED: auth_pb2.AuthChange.ROLE_ASSIGNED,
+    ROLE_UPDATED: auth_pb2.AuthChange.ROLE_UPDATED,
+    ROLE_DELETED: auth_pb2.AuthChange.ROLE_DELETED,
+    TOKEN_REVOKED: auth_pb2.AuthChange.TOKEN_REVOKED,
+    USER_VERSION: auth_pb2.AuthChange.USER_VERSION,
+    USER_GENERATION: auth_pb2.AuthChange.USER_GENERATION,
+}
+
+
+def start_watch(offset: str) -> Tuple[str, bool]:
+    """
+    Позиция, с которой читать журнал, и нужна ли клиенту полная сверка.
+    После сверки чтение идет с последнего события. ValueError - некорректный
+    offset.
+    """
+    if not offset:
+        return auth_changes.last_id(), False
+    position = parse_id(offset)
+    last_id = auth_changes.last_id()
+    # offset новее журнала (журнал начат заново) или события после него
+    # уже вытеснены
+    if position > parse_id(last_id) or auth_changes.is_trimmed(offset):
+        return last_id, True
+    return offset, False
+
+
+def resync_message(offset: str):
+    return auth_pb2.AuthChange(sequence=offset, type=auth_pb2.AuthChange.RESYNC)
+
+
+def change_message(event_id: str, fields: dict):
+    user_ids = fields.get('user_ids')
+    return auth_pb2.AuthChange(
+        sequence=event_id,
+        type=CHANGE_TYPES[fields['type']],
+        user_ids=user_ids.split(',') if user_ids else [],
+        role_id=fields.get('role_id', ''),
+        role_name=fields.get('role_name', ''),
+        jti=fields.get('jti', ''),
+        exp=int(fields.get('exp', 0)),
+        counter=int(fields.get('counter', 0)),
+    )
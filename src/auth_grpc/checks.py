@@ -0,0 +1,42 @@
+from typing import Dict, List, Optional
+
+from services.decision_cache import INVALID_CHECK, RoleCheck, decision_cache
+
+import auth_pb2
+
+
+def lookup_checks(checks) -> List[RoleCheck]:
+    """
+    Проверяет токены пачки (подпись - один раз на токен) и достает готовые
+    решения из кеша. login None - запрос без токена, ролей или с невалидным
+    токеном, result None - решение нужно вычислить.
+    """
+    return [
+        decision_cache.lookup(check.access_token, check.roles)
+        if check.access_token and check.roles
+        else INVALID_CHECK
+        for check in checks
+    ]
+
+
+def pending_logins(states: List[RoleCheck]) -> List[str]:
+    """Логины, для которых нужно прочитать роль."""
+    return list(
+        {state.login for state in states if state.login and state.result is None}
+    )
+
+
+def role_results(checks, states, role_names: Dict[str, Optional[str]]) -> list:
+    """Ответы CheckRole в порядке запросов, role_names - роль по логину."""
+    results = []
+    for check, state in zip(checks, states):
+        if not state.login:
+            results.append(auth_pb2.CheckRoleResponse(result=False, status="Error"))
+            continue
+        result = state.result
+        if result is None:
+            role_name = role_names.get(state.login)
+            result = bool(role_name and role_name in check.roles)
+            decision_cache.store(state, result)
+        results.append(auth_pb2.CheckRoleResponse(result=result, status="Success"))
+    return results
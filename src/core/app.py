@@ -1,4 +1,3 @@
-import datetime
 import os
 from http import HTTPStatus
 
@@ -6,17 +5,28 @@ import sentry_sdk
 from db.pg_db import db, init_db
 from db.redis_db import init_redis_db, redis_db
 from flasgger import Swagger
-from flask import Flask, jsonify, request
-from flask_jwt_extended import (JWTManager, get_jwt_identity,
-                                verify_jwt_in_request)
+from flask import Flask, g, jsonify, request
+from flask_jwt_extended import JWTManager
 from sentry_sdk.integrations.flask import FlaskIntegration
 
 from flask_migrate import Migrate
 from flask_opentracing import FlaskTracer
-from jwt import InvalidTokenError
 from marshmallow import ValidationError
-from models.accounts import User
+from services.auth_changes import init_auth_changes
+from services.hashing import HashingPoolSaturated, init_hashing
+from services.history_writer import init_history_writer
+from services.login_guard import init_login_guard
+from services.passwords import init_password_hasher
+from services.rate_limit import check_rate_limit, init_rate_limiter
+from services.refresh_families import init_refresh_families
+from services.request_context import (check_request_context,
+                                      request_context_headers)
+from services.revoked_tokens import revoked_tokens
+from services.role_cache import init_role_cache
+from services.signing_keys import init_signing_keys
+from services.user_cache import init_user_cache
 from tracer import setup_jaeger
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 
 def validation_bad_request_handler(e):
@@ -43,8 +53,22 @@ def forbidden_handler(e):
     )
 
 
+def hashing_saturated_handler(e):
+    return (
+        jsonify(
+            {
+                'status': 'error',
+                'message': 'Сервис перегружен, повторите запрос позже',
+            }
+        ),
+        HTTPStatus.SERVICE_UNAVAILABLE,
+        {'Retry-After': '1'},
+    )
+
+
 def create_app(configuration='core.config.DevelopmentBaseConfig'):
     from api.accounts import accounts
+    from api.jwks import jwks
     from api.rbac import rbac
 
     sentry_sdk.init(
@@ -56,16 +80,29 @@ def create_app(configuration='core.config.DevelopmentBaseConfig'):
 
     app = Flask(__name__)
     app.config.from_object(configuration)
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
     init_db(app)
     init_redis_db(app)
     migrate.init_app(app, db)
     app.register_blueprint(rbac, url_prefix='/api/v1/rbac')
     app.register_blueprint(accounts, url_prefix='/api/v1/accounts')
+    app.register_blueprint(jwks)
+    init_rate_limiter(app)
+    init_login_guard(app)
+    init_refresh_families(app)
+    init_user_cache(app)
+    init_role_cache(app)
+    init_hashing(app)
+    init_password_hasher(app)
+    init_history_writer(app)
+    init_auth_changes(app)
 
     swagger = Swagger(app)
     jwt = JWTManager(app)
+    init_signing_keys(app, jwt)
     app.register_error_handler(ValidationError, validation_bad_request_handler)
     app.register_error_handler(403, forbidden_handler)
+    app.register_error_handler(HashingPoolSaturated, hashing_saturated_handler)
     tracer = FlaskTracer(setup_jaeger, True, app=app)
 
     @app.before_request
@@ -76,48 +113,38 @@ def create_app(configuration='core.config.DevelopmentBaseConfig'):
 
     @app.before_request
     def rate_limit():
-        user_id = 'anonymous'
-        data = request.get_json() or {}
-        login = data.get('login', None)
-        if not login:
-            try:
-                verify_jwt_in_request()
-            except InvalidTokenError:
-                pass
-            else:
-                login = get_jwt_identity()
-                user = User.query.filter_by(login=login).first()
-                if user:
-                    user_id = user.id
-
-        pipe = redis_db.pipeline()
-        now = datetime.datetime.now()
-        key = f'{user_id}:{now.minute}'
-        pipe.incr(key, 1)
-        pipe.expire(key, 59)
-        result = pipe.execute()
-        request_number = result[0]
-        if request_number > app.config['REQUEST_LIMIT_PER_MINUTE']:
-            return (
-                jsonify(
-                    {
-                        'status': 'error',
-                        'message': 'Слишком много запросов',
-                    }
-                ),
-                HTTPStatus.TOO_MANY_REQUESTS,
+        result = check_rate_limit()
+        g.rate_limit = result
+        if not result.allowed:
+            response = jsonify(
+                {
+                    'status': 'error',
+                    'message': 'Слишком много запросов',
+                }
             )
+            response.status_code = HTTPStatus.TOO_MANY_REQUESTS
+            return response
+
+    @app.after_request
+    def rate_limit_headers(response):
+        result = g.get('rate_limit')
+        if result:
+            response.headers.extend(result.headers)
+        return response
 
     @jwt.token_in_blocklist_loader
     def check_if_token_is_revoked(jwt_header, jwt_payload):
-        jti = jwt_payload['jti']
-        token_in_redis = redis_db.get(jti)
-        return token_in_redis is not None
+        return revoked_tokens.is_revoked(jwt_payload)
 
     @app.before_first_request
     def setup_db():
         db.create_all()
 
+    if app.debug:
+        # Каждое значение контекста запроса вычисляется не больше одного раза
+        app.after_request(request_context_headers)
+        app.teardown_request(check_request_context)
+
     @app.teardown_appcontext
     def close_db(sender, **extra):
         db.session.close()
@@ -1,3 +1,4 @@
+import json
 import os
 from datetime import timedelta
 
@@ -33,11 +34,141 @@ class BaseConfig:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
+    # RS256/EdDSA - подпись ключами из JWT_SIGNING_KEYS_DIR, публичные ключи
+    # отдаются на /.well-known/jwks.json. HS256 - подпись JWT_SECRET_KEY.
+    # Пустые значения из template.env означают настройки по умолчанию
+    JWT_ALGORITHM = os.getenv('JWT_ALGORITHM') or 'HS256'
+    JWT_SIGNING_KEYS_DIR = os.getenv('JWT_SIGNING_KEYS_DIR') or os.path.join(
+        BASE_DIR, 'keys'
+    )
+    JWKS_MAX_AGE = int(os.getenv('JWKS_MAX_AGE', 60 * 60))
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
     JSON_AS_ASCII = False
 
+    # Сколько секунд запись пользователя живет в кеше Redis
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 5 * 60))
+    # Как часто воркер сверяет версию таблицы ролей в Redis
+    ROLE_CACHE_CHECK_INTERVAL = int(os.getenv('ROLE_CACHE_CHECK_INTERVAL', 5))
+
+    # Пул потоков для хеширования паролей в gevent воркере (0 - по числу ядер)
+    # и сколько хеширований может ждать в очереди, прежде чем отвечать 503
+    HASHING_POOL_SIZE = int(os.getenv('HASHING_POOL_SIZE', 0))
+    HASHING_MAX_BACKLOG = int(os.getenv('HASHING_MAX_BACKLOG', 64))
+    # Как часто воркер публикует метрики пула хеширования в Redis (секунды)
+    HASHING_STATS_INTERVAL = int(os.getenv('HASHING_STATS_INTERVAL', 10))
+
+    # Схема для новых хешей паролей: argon2, scrypt или pbkdf2_sha256.
+    # Параметры подбираются под железо командой flask accounts tune_password_hash
+    # и задаются JSON в PASSWORD_HASH_PARAMS
+    PASSWORD_HASH_SCHEME = os.getenv('PASSWORD_HASH_SCHEME') or 'argon2'
+    PASSWORD_HASH_PARAMS = {
+        'argon2': {
+            'type': 'ID', 'time_cost': 2, 'memory_cost': 64 * 1024, 'parallelism': 2
+        },
+        'scrypt': {'rounds': 15, 'block_size': 8, 'parallelism': 1},
+        'pbkdf2_sha256': {'rounds': 260000},
+        **json.loads(os.getenv('PASSWORD_HASH_PARAMS') or '{}'),
+    }
+    # Целевое время проверки пароля для tune_password_hash
+    PASSWORD_HASH_TARGET_MS = int(os.getenv('PASSWORD_HASH_TARGET_MS', 250))
+
+    # История входов пишется пачками: не больше HISTORY_BATCH_SIZE строк
+    # и не реже раза в HISTORY_FLUSH_INTERVAL_MS. Сверх HISTORY_MAX_QUEUE
+    # событий в очереди воркера новые отбрасываются. При остановке воркер
+    # ждет текущую запись не дольше HISTORY_SHUTDOWN_TIMEOUT секунд
+    HISTORY_BATCH_SIZE = int(os.getenv('HISTORY_BATCH_SIZE', 500))
+    HISTORY_FLUSH_INTERVAL_MS = int(os.getenv('HISTORY_FLUSH_INTERVAL_MS', 200))
+    HISTORY_MAX_QUEUE = int(os.getenv('HISTORY_MAX_QUEUE', 10000))
+    HISTORY_SHUTDOWN_TIMEOUT = int(os.getenv('HISTORY_SHUTDOWN_TIMEOUT', 5))
+
+    # На сколько месяцев вперед создаются партиции истории входов и сколько
+    # месяцев она хранится (flask accounts maintain_history_partitions)
+    HISTORY_PARTITIONS_AHEAD = int(os.getenv('HISTORY_PARTITIONS_AHEAD', 3))
+    HISTORY_RETENTION_MONTHS = int(os.getenv('HISTORY_RETENTION_MONTHS', 12))
+
+    # Сколько строк истории выгрузка читает из серверного курсора за раз
+    HISTORY_EXPORT_CHUNK_SIZE = int(os.getenv('HISTORY_EXPORT_CHUNK_SIZE', 1000))
+
+    # Сколько прокси перед приложением дописывают X-Forwarded-For (nginx)
+    PROXY_FIX_X_FOR = int(os.getenv('PROXY_FIX_X_FOR', 1))
+
+    # Лимит по умолчанию для эндпоинтов без своей политики
     REQUEST_LIMIT_PER_MINUTE = 60
+    # Политики по эндпоинтам (request.endpoint): limit запросов за window
+    # секунд, burst - емкость корзины, key - 'user' или 'ip', roles -
+    # переопределения для ролей из db/fixtures/roles.json
+    RATE_LIMIT_ENDPOINT_POLICIES = {
+        'accounts.sign_in': {'limit': 10, 'window': 60, 'burst': 5, 'key': 'ip'},
+        'accounts.register': {'limit': 5, 'window': 60, 'burst': 3, 'key': 'ip'},
+        'accounts.refresh': {'limit': 10, 'window': 60, 'burst': 5},
+        'rbac.role_check': {
+            'limit': 600,
+            'window': 60,
+            'burst': 100,
+            'roles': {
+                'SubscribeUser': {'limit': 1200, 'burst': 200},
+                'Admin': {'limit': 3000, 'burst': 500},
+            },
+        },
+    }
+    # Политики по умолчанию для ролей на остальных эндпоинтах
+    RATE_LIMIT_ROLE_POLICIES = {
+        'SubscribeUser': {'limit': 120, 'burst': 120},
+        'Admin': {'limit': 600, 'burst': 600},
+    }
+    # Локальный пре-лимитер: воркер резервирует в Redis пачку из LEASE_SIZE
+    # токенов и тратит их в памяти не дольше LEASE_TTL_MS. Ошибка глобального
+    # лимита не превышает (число воркеров * LEASE_SIZE) токенов за LEASE_TTL_MS.
+    # 0 - каждый запрос идет в Redis.
+    RATE_LIMIT_LOCAL_LEASE_SIZE = int(os.getenv('RATE_LIMIT_LOCAL_LEASE_SIZE', 0))
+    RATE_LIMIT_LOCAL_LEASE_TTL_MS = int(os.getenv('RATE_LIMIT_LOCAL_LEASE_TTL_MS', 1000))
+
+    # Защита от подбора пароля: после LOGIN_GUARD_THRESHOLD ошибок подряд
+    # вход блокируется на BASE_LOCKOUT секунд, удваиваясь с каждой ошибкой
+    # до MAX_LOCKOUT. При попытках с DISTINCT_IPS разных IP логин сразу
+    # блокируется на MAX_LOCKOUT. Счетчики живут TTL секунд.
+    LOGIN_GUARD_THRESHOLD = int(os.getenv('LOGIN_GUARD_THRESHOLD', 5))
+    LOGIN_GUARD_BASE_LOCKOUT = int(os.getenv('LOGIN_GUARD_BASE_LOCKOUT', 1))
+    LOGIN_GUARD_MAX_LOCKOUT = int(os.getenv('LOGIN_GUARD_MAX_LOCKOUT', 15 * 60))
+    LOGIN_GUARD_DISTINCT_IPS = int(os.getenv('LOGIN_GUARD_DISTINCT_IPS', 20))
+    LOGIN_GUARD_TTL = int(os.getenv('LOGIN_GUARD_TTL', 60 * 60))
+
+    # gRPC сервер. auth_check.py - пул из GRPC_SYNC_WORKERS потоков,
+    # aio_server.py - asyncio сервер без контекста Flask с пулом соединений
+    # GRPC_DB_POOL_SIZE и не больше GRPC_MAX_CONCURRENT_RPCS вызовов
+    # одновременно, в GRPC_PROCESSES процессах на одном порту (SO_REUSEPORT,
+    # 0 - по числу ядер)
+    GRPC_PORT = int(os.getenv('GRPC_PORT', 50051))
+    GRPC_MAX_MESSAGE_LENGTH = int(os.getenv('GRPC_MAX_MESSAGE_LENGTH', 4 * 1024 * 1024))
+    GRPC_SYNC_WORKERS = int(os.getenv('GRPC_SYNC_WORKERS', 10))
+    GRPC_PROCESSES = int(os.getenv('GRPC_PROCESSES', 0))
+    GRPC_MAX_CONCURRENT_RPCS = int(os.getenv('GRPC_MAX_CONCURRENT_RPCS', 1000))
+    GRPC_DB_POOL_SIZE = int(os.getenv('GRPC_DB_POOL_SIZE', 10))
+    # Кеш решений CheckRole в процессе gRPC: число записей, сколько секунд
+    # живет решение и как часто метрики кеша публикуются в Redis
+    DECISION_CACHE_SIZE = int(os.getenv('DECISION_CACHE_SIZE', 100000))
+    DECISION_CACHE_TTL = int(os.getenv('DECISION_CACHE_TTL', 60))
+    DECISION_CACHE_STATS_INTERVAL = int(os.getenv('DECISION_CACHE_STATS_INTERVAL', 30))
+    # Фильтр Блума id пользователей для CheckUserExists: ожидаемое число
+    # пользователей (фильтр берет не меньше удвоенного текущего), доля ложных
+    # срабатываний и размер пачки при чтении таблицы user
+    USER_FILTER_CAPACITY = int(os.getenv('USER_FILTER_CAPACITY', 1000000))
+    USER_FILTER_ERROR_RATE = float(os.getenv('USER_FILTER_ERROR_RATE', 0.01))
+    USER_FILTER_SCAN_CHUNK = int(os.getenv('USER_FILTER_SCAN_CHUNK', 10000))
+
+    # Журнал изменений авторизации (WatchAuthChanges): сколько последних
+    # событий хранит Redis Stream, сколько событий отдается за одно чтение
+    # и сколько чтение ждет новые события. aio сервер читает журнал одним
+    # потоком на процесс и держит AUTH_CHANGES_BUFFER_SIZE последних событий
+    # для подписок. В синхронном сервере подписка занимает поток пула до
+    # отключения, поэтому их не больше AUTH_CHANGES_SYNC_WATCHERS (0 - только
+    # в aio сервере)
+    AUTH_CHANGES_MAX_LENGTH = int(os.getenv('AUTH_CHANGES_MAX_LENGTH', 100000))
+    AUTH_CHANGES_BATCH_SIZE = int(os.getenv('AUTH_CHANGES_BATCH_SIZE', 100))
+    AUTH_CHANGES_BLOCK_MS = int(os.getenv('AUTH_CHANGES_BLOCK_MS', 5000))
+    AUTH_CHANGES_BUFFER_SIZE = int(os.getenv('AUTH_CHANGES_BUFFER_SIZE', 1000))
+    AUTH_CHANGES_SYNC_WATCHERS = int(os.getenv('AUTH_CHANGES_SYNC_WATCHERS', 2))
 
 
 class DevelopmentBaseConfig(BaseConfig):
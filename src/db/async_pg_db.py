@@ -0,0 +1,13 @@
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from db.pg_db import get_database_uri
+
+
+def create_async_db(config) -> AsyncEngine:
+    """Асинхронный пул соединений (asyncpg) для кода вне Flask."""
+    return create_async_engine(
+        get_database_uri(config, driver='postgresql+asyncpg'),
+        pool_size=config['GRPC_DB_POOL_SIZE'],
+        max_overflow=0,
+        pool_pre_ping=True,
+    )
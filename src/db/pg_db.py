@@ -4,12 +4,14 @@ from flask_sqlalchemy import SQLAlchemy
 db = SQLAlchemy()
 
 
+def get_database_uri(config, driver: str = 'postgresql') -> str:
+    username = config['POSTGRES_USER']
+    password = config['POSTGRES_PASSWORD']
+    host = config['POSTGRES_HOST']
+    database_name = config['POSTGRES_DB']
+    return f'{driver}://{username}:{password}@{host}/{database_name}'
+
+
 def init_db(app: Flask):
-    username = app.config['POSTGRES_USER']
-    password = app.config['POSTGRES_PASSWORD']
-    host = app.config['POSTGRES_HOST']
-    database_name = app.config['POSTGRES_DB']
-    app.config[
-        'SQLALCHEMY_DATABASE_URI'
-    ] = f'postgresql://{username}:{password}@{host}/{database_name}'
+    app.config['SQLALCHEMY_DATABASE_URI'] = get_database_uri(app.config)
     db.init_app(app)
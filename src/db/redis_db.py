@@ -2,6 +2,7 @@ from flask import Flask
 from flask_redis import FlaskRedis
 
 redis_db = FlaskRedis()
+rate_limit_redis = FlaskRedis(config_prefix='REDIS_RATE')
 
 
 def init_redis_db(app: Flask):
@@ -9,6 +10,9 @@ def init_redis_db(app: Flask):
     host = app.config['REDIS_HOST']
     port = app.config['REDIS_PORT']
     db = app.config['REDIS_DB']
+    rate_db = app.config['REDIS_RATE_DB']
     app.config['REDIS_URL'] = f"redis://{host}:{port}/{db}"
+    app.config['REDIS_RATE_URL'] = f"redis://{host}:{port}/{rate_db}"
 
     redis_db.init_app(app)
+    rate_limit_redis.init_app(app)
@@ -3,24 +3,24 @@ import string
 from datetime import datetime
 
 from db.pg_db import db
-from sqlalchemy import UniqueConstraint
+from flask import current_app
+from sqlalchemy import Index, UniqueConstraint, text
 from sqlalchemy.dialects.postgresql import UUID
-from werkzeug.security import check_password_hash, generate_password_hash
 
 from models.mixins import BaseModelMixin
-from models.rbac import Role
+from services.hashing import hashing_executor
+from services.history_partitions import (HISTORY_TABLE,
+                                         create_device_partitions,
+                                         create_month_partitions)
+from services.passwords import password_hasher
+from services.role_cache import role_cache
 
 
 def create_partition(target, connection, **kw) -> None:
     """ creating partition by user_sign_in """
-    connection.execute(
-        """CREATE TABLE IF NOT EXISTS "user_sign_in_smart" PARTITION OF "users_sign_in" FOR VALUES IN ('smart')"""
-    )
-    connection.execute(
-        """CREATE TABLE IF NOT EXISTS "user_sign_in_mobile" PARTITION OF "users_sign_in" FOR VALUES IN ('mobile')"""
-    )
-    connection.execute(
-        """CREATE TABLE IF NOT EXISTS "user_sign_in_web" PARTITION OF "users_sign_in" FOR VALUES IN ('web')"""
+    create_device_partitions(connection)
+    create_month_partitions(
+        connection, ahead=current_app.config['HISTORY_PARTITIONS_AHEAD']
     )
 
 
@@ -41,18 +41,27 @@ class User(db.Model, BaseModelMixin):
     )
 
     def set_password(self, password):
-        self.password = generate_password_hash(password)
+        self.password = hashing_executor.run(password_hasher.hash, password)
 
     def check_password(self, password):
-        return check_password_hash(self.password, password)
+        """
+        Проверяет пароль. Если хеш посчитан устаревшей схемой или параметрами,
+        заменяет его новым, коммит остается за вызывающим кодом.
+        """
+        is_valid, new_hash = hashing_executor.run(
+            password_hasher.verify, password, self.password
+        )
+        if is_valid and new_hash:
+            self.password = new_hash
+        return is_valid
 
     @classmethod
     def check_role(cls, login, required_role):
         user = cls.query.filter_by(login=login).first()
         if not user:
             return False
-        user_role = Role.query.filter_by(id=user.role_id).first()
-        if user_role.name != required_role:
+        user_role = role_cache.get_by_id(user.role_id)
+        if not user_role or user_role.name != required_role:
             return False
         return True
 
@@ -89,11 +98,16 @@ class SocialAccount(db.Model, BaseModelMixin):
             password = ''.join(random.choice(string.ascii_lowercase) for _ in range(15))
             if User.query.filter_by(login=username).first():
                 username = f"{social_id}_{username}"
-            role = Role.query.filter_by(name='BaseUser').first().id
-            user = User(email=email, login=username, role=role)
+            from services.user_cache import user_cache
+            from services.user_filter import UserFilter
+
+            role_id = role_cache.get_by_name('BaseUser').id
+            user = User(email=email, login=username, role_id=role_id)
             user.set_password(password)
             db.session.add(user)
             db.session.commit()
+            user_cache.invalidate(user.id, user.login)
+            UserFilter.publish_created(user.id)
             social_account = SocialAccount(
                 user_id=user.id, social_id=social_id, social_name=social_name
             )
@@ -103,9 +117,16 @@ class SocialAccount(db.Model, BaseModelMixin):
 
 
 class History(db.Model, BaseModelMixin):
-    __tablename__ = 'users_sign_in'
+    __tablename__ = HISTORY_TABLE
     __table_args__ = (
-        UniqueConstraint('id', 'user_device_type'),
+        UniqueConstraint('id', 'user_device_type', 'date'),
+        # Под постраничный вывод истории пользователя по (date, id)
+        Index(
+            'ix_users_sign_in_user_id_date',
+            'user_id',
+            text('date DESC'),
+            text('id DESC'),
+        ),
         {
             'postgresql_partition_by': 'LIST (user_device_type)',
             'listeners': [('after_create', create_partition)],
@@ -115,9 +136,34 @@ class History(db.Model, BaseModelMixin):
         'user_id', UUID(as_uuid=True), db.ForeignKey('user.id', ondelete='CASCADE')
     )
     user_agent = db.Column(db.String)
-    date = db.Column(db.DateTime(), default=datetime.utcnow)
+    # Ключ партиционирования по месяцам, поэтому входит в первичный ключ
+    date = db.Column(db.DateTime(), default=datetime.utcnow, primary_key=True)
     info = db.Column(db.String)
     user_device_type = db.Column(db.Text, primary_key=True)
 
     def __str__(self):
         return f'<History {self.user_id}>'
+
+
+class HistoryDeviceStats(db.Model):
+    """Число записей истории за день по типу устройства."""
+
+    __tablename__ = 'users_sign_in_device_stats'
+
+    day = db.Column(db.Date, primary_key=True)
+    user_device_type = db.Column(db.Text, primary_key=True)
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class HistoryUserStats(db.Model):
+    """Число записей истории пользователя за день, строки дня - активные пользователи."""
+
+    __tablename__ = 'users_sign_in_user_stats'
+
+    user_id = db.Column(
+        UUID(as_uuid=True),
+        db.ForeignKey('user.id', ondelete='CASCADE'),
+        primary_key=True,
+    )
+    day = db.Column(db.Date, primary_key=True, index=True)
+    count = db.Column(db.BigInteger, nullable=False, default=0)
@@ -1,4 +1,5 @@
 from db.pg_db import db
+from sqlalchemy.dialects.postgresql import ARRAY
 
 from models.mixins import BaseModelMixin
 
@@ -8,6 +9,9 @@ class Role(db.Model, BaseModelMixin):
 
     name = db.Column(db.String, unique=True, nullable=False)
     description = db.Column(db.String)
+    permissions = db.Column(
+        ARRAY(db.String), nullable=False, default=list, server_default='{}'
+    )
     users = db.relationship('accounts.User', backref='role')
 
     def __str__(self):
@@ -1,6 +1,7 @@
 import validate_functions
-from marshmallow import Schema, fields, post_load
+from marshmallow import Schema, fields, post_load, validate
 from models.accounts import History
+from services.history_export import EXPORT_FORMATS
 
 
 class UserSchemaDetailed(Schema):
@@ -37,3 +38,18 @@ class UserHistorySchema(Schema):
     def create_user_history(self, data, **kwargs):
         history = History(**data)
         return history
+
+
+class HistoryExportSchema(Schema):
+    user_id = fields.UUID()
+    date_from = fields.DateTime()
+    date_to = fields.DateTime()
+    format = fields.String(
+        load_default='ndjson', validate=validate.OneOf(list(EXPORT_FORMATS))
+    )
+
+
+class HistoryStatsSchema(Schema):
+    user_id = fields.UUID()
+    date_from = fields.Date()
+    date_to = fields.Date()
@@ -7,6 +7,7 @@ class RoleSchema(Schema):
     id = fields.UUID()
     name = fields.String(validate=validate_functions.validate_role_name)
     description = fields.String()
+    permissions = fields.List(fields.String())
 
 
 class RoleAssignSchema(Schema):
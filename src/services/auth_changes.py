@@ -0,0 +1,102 @@
+import re
+from typing import Iterable, List, Tuple
+
+from flask import Flask
+
+from db.redis_db import redis_db
+
+ROLE_ASSIGNED = 'role_assigned'
+ROLE_UPDATED = 'role_updated'
+ROLE_DELETED = 'role_deleted'
+TOKEN_REVOKED = 'token_revoked'
+USER_VERSION = 'user_version'
+USER_GENERATION = 'user_generation'
+
+EVENT_ID = re.compile(r'(\d+)(?:-(\d+))?')
+
+
+class AuthChanges:
+    """
+    Журнал изменений авторизации в Redis Stream для WatchAuthChanges.
+    id записи в потоке - номер события, по нему клиент продолжает чтение
+    после переподключения. Поток обрезается примерно до max_length
+    последних событий.
+    """
+
+    stream = 'auth_changes'
+
+    def __init__(self):
+        self.max_length = 0
+
+    def init_app(self, app: Flask):
+        self.max_length = app.config['AUTH_CHANGES_MAX_LENGTH']
+
+    def add(self, pipe, kind: str, **fields):
+        """Добавляет событие в pipeline вызывающего кода."""
+        event = {'type': kind}
+        for name, value in fields.items():
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple)):
+                value = ','.join(str(item) for item in value)
+            event[name] = str(value)
+        pipe.xadd(self.stream, event, maxlen=self.max_length, approximate=True)
+
+    def publish(self, kind: str, **fields):
+        pipe = redis_db.pipeline(transaction=False)
+        self.add(pipe, kind, **fields)
+        pipe.execute()
+
+    def publish_role_assigned(self, user_ids: Iterable, role):
+        self.publish(
+            ROLE_ASSIGNED,
+            user_ids=[str(user_id) for user_id in user_ids],
+            role_id=role.id,
+            role_name=role.name,
+        )
+
+    def read(self, offset: str, count: int, block_ms: int) -> List[Tuple[str, dict]]:
+        """События строго после offset, ждет новые не дольше block_ms."""
+        response = redis_db.xread({self.stream: offset}, count=count, block=block_ms)
+        if not response:
+            return []
+        return [
+            (
+                event_id.decode(),
+                {key.decode(): value.decode() for key, value in fields.items()},
+            )
+            for event_id, fields in response[0][1]
+        ]
+
+    def last_id(self) -> str:
+        """Номер последнего события, '0-0' - поток пуст."""
+        events = redis_db.xrevrange(self.stream, count=1)
+        return events[0][0].decode() if events else '0-0'
+
+    def is_trimmed(self, offset: str) -> bool:
+        """
+        События после offset могли быть удалены из потока - клиенту нужна
+        полная сверка. Проверка консервативна: offset старше первого
+        хранимого события считается потерей.
+        """
+        # Некорректный offset отклоняется и при пустом потоке
+        position = parse_id(offset)
+        events = redis_db.xrange(self.stream, count=1)
+        if not events:
+            return False
+        return position < parse_id(events[0][0].decode())
+
+
+def parse_id(event_id: str) -> Tuple[int, int]:
+    """Номер события Redis Stream для сравнения, ValueError - некорректный."""
+    match = EVENT_ID.fullmatch(event_id)
+    if not match:
+        raise ValueError(event_id)
+    return int(match[1]), int(match[2] or 0)
+
+
+auth_changes = AuthChanges()
+
+
+def init_auth_changes(app: Flask):
+    auth_changes.init_app(app)
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import NamedTuple, Optional
+
+import jwt
+from flask import Flask
+from redis.exceptions import RedisError
+
+from db.redis_db import redis_db
+from services.revoked_tokens import revoked_tokens
+from services.signing_keys import ASYMMETRIC_ALGORITHMS, signing_keys
+
+logger = logging.getLogger(__name__)
+
+
+class CachedToken(NamedTuple):
+    claims: dict
+    expires_at: float
+
+
+class CachedDecision(NamedTuple):
+    result: bool
+    expires_at: float
+
+
+class RoleCheck(NamedTuple):
+    """Состояние одной проверки: login None - токен невалиден."""
+
+    key: Optional[tuple]
+    login: Optional[str]
+    result: Optional[bool]
+
+
+INVALID_CHECK = RoleCheck(None, None, None)
+
+
+class DecisionCache:
+    """
+    Кеш решений CheckRole в процессе gRPC сервера. Подпись токена проверяется
+    один раз, проверенные claims и решения по (хеш токена, роли) хранятся
+    в LRU не дольше ttl и не дольше жизни токена. При каждом обращении токен
+    сверяется со списком отозванных (в памяти процесса): отзыв, смена роли
+    и выход со всех устройств увеличивают версию пользователя и вытесняют
+    его записи. Метрики публикует в Redis фоновый поток процесса, поэтому
+    lookup не обращается к Redis, пока список отозванных синхронизирован.
+    """
+
+    stats_key = 'decision_cache:stats'
+    # Все счетчики создаются заранее: поток публикации читает stats, пока
+    # потоки запросов их увеличивают, и словарь не должен менять размер
+    counters = (
+        'hits',
+        'misses',
+        'verifications',
+        'invalid',
+        'evicted_revoked',
+        'evicted_expired',
+        'evicted_lru',
+    )
+
+    def __init__(self):
+        self.max_size = 0
+        self.ttl = 0
+        self.stats_interval = 0
+        self.algorithm = None
+        self.secret = None
+        self.identity_claim = 'sub'
+        self.stats = Counter(dict.fromkeys(self.counters, 0))
+        self._tokens = OrderedDict()
+        self._decisions = OrderedDict()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def init_app(self, app: Flask):
+        self.max_size = app.config['DECISION_CACHE_SIZE']
+        self.ttl = app.config['DECISION_CACHE_TTL']
+        self.stats_interval = app.config['DECISION_CACHE_STATS_INTERVAL']
+        self.algorithm = app.config['JWT_ALGORITHM']
+        self.secret = app.config['JWT_SECRET_KEY']
+        self.identity_claim = app.config['JWT_IDENTITY_CLAIM']
+
+    def lookup(self, access_token: str, roles) -> RoleCheck:
+        self._ensure_publisher()
+        now = time.time()
+        token_key = hashlib.sha256(access_token.encode()).digest()
+        claims = self._get_claims(token_key, access_token, now)
+        if claims is None:
+            return INVALID_CHECK
+        key = (token_key, tuple(sorted(roles)))
+        with self._lock:
+            decision = self._get(self._decisions, key, now)
+        if decision is None:
+            self.stats['misses'] += 1
+            return RoleCheck(key, claims.get(self.identity_claim), None)
+        self.stats['hits'] += 1
+        return RoleCheck(key, claims.get(self.identity_claim), decision.result)
+
+    def store(self, check: RoleCheck, result: bool):
+        token_key = check.key[0]
+        with self._lock:
+            token = self._tokens.get(token_key)
+            if token is None:
+                return
+            expires_at = min(token.expires_at, time.time() + self.ttl)
+            self._put(self._decisions, check.key, CachedDecision(result, expires_at))
+
+    def get_stats(self) -> dict:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            'tokens': len(self._tokens),
+            'decisions': len(self._decisions),
+            'hit_ratio': round(self.stats['hits'] / lookups, 4) if lookups else 0,
+            **self.stats,
+        }
+
+    def get_shared_stats(self) -> dict:
+        """Последние опубликованные метрики всех процессов gRPC сервера."""
+        return {
+            process.decode(): json.loads(stats)
+            for process, stats in redis_db.hgetall(self.stats_key).items()
+        }
+
+    def _get_claims(self, token_key: bytes, access_token: str, now: float):
+        with self._lock:
+            token = self._get(self._tokens, token_key, now)
+        if token is None:
+            self.stats['verifications'] += 1
+            try:
+                claims = self._verify(access_token)
+            except jwt.PyJWTError:
+                self.stats['invalid'] += 1
+                return None
+            token = CachedToken(claims, claims['exp'])
+            with self._lock:
+                self._put(self._tokens, token_key, token)
+        if revoked_tokens.is_revoked(token.claims):
+            with self._lock:
+                if self._tokens.pop(token_key, None):
+                    self.stats['evicted_revoked'] += 1
+            return None
+        return token.claims
+
+    def _verify(self, access_token: str) -> dict:
+        key = self.secret
+        if self.algorithm in ASYMMETRIC_ALGORITHMS:
+            kid = jwt.get_unverified_header(access_token).get('kid')
+            key = signing_keys.get_public_key(kid)
+        claims = jwt.decode(access_token, key, algorithms=[self.algorithm])
+        if claims.get('type') != 'access':
+            raise jwt.InvalidTokenError('Ожидается access токен')
+        return claims
+
+    def _get(self, entries: OrderedDict, key, now: float):
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            del entries[key]
+            self.stats['evicted_expired'] += 1
+            return None
+        entries.move_to_end(key)
+        return entry
+
+    def _put(self, entries: OrderedDict, key, entry):
+        entries[key] = entry
+        entries.move_to_end(key)
+        while len(entries) > self.max_size:
+            entries.popitem(last=False)
+            self.stats['evicted_lru'] += 1
+
+    def _ensure_publisher(self):
+        # Поток публикации запускается в каждом процессе отдельно (после fork)
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        self._pid = pid
+        threading.Thread(target=self._publish_stats, daemon=True).start()
+
+    def _publish_stats(self):
+        process = f'{socket.gethostname()}:{os.getpid()}'
+        while True:
+            time.sleep(self.stats_interval)
+            try:
+                redis_db.hset(self.stats_key, process, json.dumps(self.get_stats()))
+            except RedisError:
+                logger.exception('Не удалось опубликовать метрики кеша решений')
+
+
+decision_cache = DecisionCache()
+
+
+def init_decision_cache(app: Flask):
+    decision_cache.init_app(app)
@@ -0,0 +1,133 @@
+import logging
+import os
+import time
+from collections import Counter
+
+from flask import Flask
+from gevent import monkey
+from redis.exceptions import RedisError
+
+from db.redis_db import redis_db
+
+logger = logging.getLogger(__name__)
+
+
+class HashingPoolSaturated(Exception):
+    pass
+
+
+class HashingExecutor:
+    """
+    Выполняет хеширование паролей вне gevent hub.
+
+    В gevent воркере задачи уходят в пул нативных потоков: PBKDF2 и scrypt
+    из hashlib (как и argon2) отпускают GIL, поэтому потоки считают на всех
+    ядрах, а остальные гринлеты воркера продолжают обслуживать запросы.
+    Вне gevent (gRPC сервер, CLI) хеш считается синхронно.
+
+    Счетчики воркеров (отклоненные задачи, суммарное ожидание в очереди)
+    и текущая очередь каждого воркера не реже раза в stats_interval
+    попадают в общий hash Redis для flask accounts hashing_stats.
+    """
+
+    stats_key = 'hashing:stats'
+    counters = ('submitted', 'completed', 'rejected', 'wait_ms')
+
+    def __init__(self):
+        self.size = 0
+        self.max_backlog = 0
+        self.stats_interval = 0
+        self.pending = 0
+        self.stats = Counter()
+        self._published = Counter()
+        self._published_at = 0
+        self._pool = None
+        self._pid = None
+
+    def init_app(self, app: Flask):
+        self.size = app.config['HASHING_POOL_SIZE'] or os.cpu_count()
+        self.max_backlog = app.config['HASHING_MAX_BACKLOG']
+        self.stats_interval = app.config['HASHING_STATS_INTERVAL']
+
+    def run(self, fn, *args):
+        pool = self._get_pool()
+        if pool is None:
+            return fn(*args)
+        if self.pending >= self.max_backlog:
+            self.stats['rejected'] += 1
+            self._publish_stats()
+            raise HashingPoolSaturated()
+        self.pending += 1
+        self.stats['submitted'] += 1
+        submitted = time.monotonic()
+        try:
+            # Блокирует только текущий гринлет
+            started, result = pool.apply(_timed, (fn, args))
+        finally:
+            self.pending -= 1
+        self.stats['completed'] += 1
+        self.stats['wait_ms'] += int((started - submitted) * 1000)
+        self._publish_stats()
+        return result
+
+    def get_stats(self) -> dict:
+        return {
+            'size': self.size,
+            'pending': self.pending,
+            'queued': max(0, self.pending - self.size),
+            **self.stats,
+        }
+
+    def get_shared_stats(self) -> dict:
+        """Счетчики всех воркеров из Redis, queued:<pid> - очередь воркера."""
+        stats = {
+            name.decode(): int(value)
+            for name, value in redis_db.hgetall(self.stats_key).items()
+        }
+        if stats.get('completed'):
+            stats['avg_wait_ms'] = round(stats['wait_ms'] / stats['completed'], 1)
+        return stats
+
+    def _publish_stats(self):
+        now = time.monotonic()
+        if now - self._published_at < self.stats_interval:
+            return
+        self._published_at = now
+        try:
+            pipe = redis_db.pipeline(transaction=False)
+            for name in self.counters:
+                delta = self.stats[name] - self._published[name]
+                pipe.hincrby(self.stats_key, name, delta)
+            queued = max(0, self.pending - self.size)
+            pipe.hset(self.stats_key, f'queued:{self._pid}', queued)
+            pipe.execute()
+        except RedisError:
+            logger.exception('Не удалось обновить статистику хеширования паролей')
+            return
+        self._published = self.stats.copy()
+
+    def _get_pool(self):
+        # Пул создается в каждом воркере после fork
+        pid = os.getpid()
+        if self._pid != pid:
+            self._pid = pid
+            self._pool = None
+            self.stats.clear()
+            self._published.clear()
+            if monkey.is_module_patched('threading'):
+                from gevent.threadpool import ThreadPool
+
+                self._pool = ThreadPool(self.size)
+        return self._pool
+
+
+def _timed(fn, args):
+    # Момент, когда задача дошла до потока пула: до него она ждала в очереди
+    return time.monotonic(), fn(*args)
+
+
+hashing_executor = HashingExecutor()
+
+
+def init_hashing(app: Flask):
+    hashing_executor.init_app(app)
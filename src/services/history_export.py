@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator, Optional
+
+from db.pg_db import db
+from models.accounts import History
+
+EXPORT_COLUMNS = (
+    History.id,
+    History.user_id,
+    History.date,
+    History.user_device_type,
+    History.user_agent,
+    History.info,
+)
+EXPORT_FIELDS = tuple(column.key for column in EXPORT_COLUMNS)
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def iter_history_rows(
+    chunk_size: int,
+    user_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+) -> Iterator[list]:
+    """
+    Строки истории пачками по chunk_size. yield_per открывает именованный
+    серверный курсор psycopg2, поэтому в памяти держится одна пачка кортежей,
+    ORM-объекты не создаются.
+    """
+    query = db.session.query(*EXPORT_COLUMNS)
+    if user_id:
+        query = query.filter(History.user_id == user_id)
+    if date_from:
+        query = query.filter(History.date >= date_from)
+    if date_to:
+        query = query.filter(History.date < date_to)
+    rows = query.order_by(History.date).yield_per(chunk_size)
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def export_history(export_format: str, chunk_size: int, **filters) -> Iterator[str]:
+    """Выгрузка истории в NDJSON или CSV, одна строка результата на пачку строк."""
+    chunks = iter_history_rows(chunk_size, **filters)
+    if export_format == 'csv':
+        yield _csv_chunk([EXPORT_FIELDS])
+        for chunk in chunks:
+            yield _csv_chunk(map(_serialize, chunk))
+    else:
+        for chunk in chunks:
+            yield ''.join(
+                json.dumps(dict(zip(EXPORT_FIELDS, _serialize(row))), ensure_ascii=False)
+                + '\n'
+                for row in chunk
+            )
+
+
+def _serialize(row) -> list:
+    return [_serialize_value(value) for value in row]
+
+
+def _serialize_value(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    # UUID
+    return str(value)
+
+
+def _csv_chunk(rows) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
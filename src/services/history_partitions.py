@@ -0,0 +1,141 @@
+import re
+from datetime import date
+from typing import Dict, List, Tuple
+
+DEVICE_TYPES = ('smart', 'mobile', 'web')
+HISTORY_TABLE = 'users_sign_in'
+
+MONTH_SUFFIX = re.compile(r'_(\d{4})_(\d{2})$')
+
+
+def device_partition(device: str) -> str:
+    return f'user_sign_in_{device}'
+
+
+def month_partition(device: str, month: date) -> str:
+    return f'{device_partition(device)}_{month:%Y_%m}'
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def current_month() -> date:
+    return date.today().replace(day=1)
+
+
+def default_partition(device: str) -> str:
+    return f'{device_partition(device)}_default'
+
+
+def create_device_partitions(connection):
+    """
+    Партиции по типу устройства, каждая разбита по месяцам поля date.
+    Строки вне созданных месяцев попадают в партицию DEFAULT, чтобы вставка
+    не падала, если обслуживание партиций отстало.
+    """
+    for device in DEVICE_TYPES:
+        parent = device_partition(device)
+        connection.execute(
+            f"""CREATE TABLE IF NOT EXISTS "{parent}" PARTITION OF "{HISTORY_TABLE}" """
+            f"""FOR VALUES IN ('{device}') PARTITION BY RANGE (date)"""
+        )
+        connection.execute(
+            f"""CREATE TABLE IF NOT EXISTS "{default_partition(device)}" """
+            f"""PARTITION OF "{parent}" DEFAULT"""
+        )
+
+
+def create_month_partitions(connection, ahead: int) -> List[str]:
+    """Создает партиции текущего месяца и ahead следующих, возвращает новые."""
+    created = []
+    existing = {name for _, name, _ in list_month_partitions(connection)}
+    for offset in range(ahead + 1):
+        month = add_months(current_month(), offset)
+        for device in DEVICE_TYPES:
+            name = month_partition(device, month)
+            if name in existing:
+                continue
+            create_month_partition(connection, device, month)
+            created.append(name)
+    return created
+
+
+def create_month_partition(connection, device: str, month: date):
+    """
+    Создает партицию месяца. Если строки этого месяца уже попали в DEFAULT,
+    PostgreSQL не даст создать партицию поверх них: DEFAULT отсоединяется,
+    строки переносятся в новую партицию, и DEFAULT подключается обратно.
+    """
+    parent = device_partition(device)
+    default = default_partition(device)
+    name = month_partition(device, month)
+    bounds = {'start': month, 'end': add_months(month, 1)}
+    in_month = 'date >= %(start)s AND date < %(end)s'
+    stray = connection.execute(
+        f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE {in_month})', bounds
+    ).scalar()
+    if stray:
+        connection.execute(f'ALTER TABLE "{parent}" DETACH PARTITION "{default}"')
+    connection.execute(
+        f"""CREATE TABLE "{name}" PARTITION OF "{parent}" """
+        f"""FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"""
+    )
+    if stray:
+        connection.execute(
+            f'WITH moved AS (DELETE FROM "{default}" WHERE {in_month} RETURNING *) '
+            f'INSERT INTO "{name}" SELECT * FROM moved',
+            bounds,
+        )
+        connection.execute(f'ALTER TABLE "{parent}" ATTACH PARTITION "{default}" DEFAULT')
+
+
+def drop_expired_partitions(connection, retention: int, detach_only: bool) -> List[str]:
+    """
+    Отсоединяет (detach_only) или удаляет месячные партиции старше retention
+    месяцев. Удаление партиции не оставляет мертвых строк, в отличие от DELETE.
+    """
+    oldest = add_months(current_month(), -retention)
+    expired = []
+    for parent, name, month in list_month_partitions(connection):
+        if month >= oldest:
+            continue
+        connection.execute(f'ALTER TABLE "{parent}" DETACH PARTITION "{name}"')
+        if not detach_only:
+            connection.execute(f'DROP TABLE "{name}"')
+        expired.append(name)
+    return expired
+
+
+def purge_default_partitions(connection, retention: int) -> Dict[str, int]:
+    """Удаляет из партиций DEFAULT строки старше retention месяцев."""
+    oldest = add_months(current_month(), -retention)
+    purged = {}
+    for device in DEVICE_TYPES:
+        default = default_partition(device)
+        result = connection.execute(
+            f'DELETE FROM "{default}" WHERE date < %(oldest)s', {'oldest': oldest}
+        )
+        if result.rowcount:
+            purged[default] = result.rowcount
+    return purged
+
+
+def list_month_partitions(connection) -> List[Tuple[str, str, date]]:
+    """Месячные партиции: (партиция устройства, имя, первый день месяца)."""
+    rows = connection.execute(
+        """
+        SELECT parent.relname, child.relname FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = ANY(%(parents)s)
+        """,
+        {'parents': [device_partition(device) for device in DEVICE_TYPES]},
+    )
+    partitions = []
+    for parent, name in rows:
+        match = MONTH_SUFFIX.search(name)
+        if match:
+            partitions.append((parent, name, date(int(match[1]), int(match[2]), 1)))
+    return sorted(partitions, key=lambda partition: partition[2])
@@ -0,0 +1,127 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import Date, cast, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from db.pg_db import db
+from models.accounts import History, HistoryDeviceStats, HistoryUserStats
+
+device_stats = HistoryDeviceStats.__table__
+user_stats = HistoryUserStats.__table__
+
+
+def update_stats(connection, events: Iterable[dict]):
+    """
+    Добавляет пачку записей истории в дневные агрегаты. Вызывается писателем
+    истории в той же транзакции, что и вставка самих записей.
+    """
+    by_device = Counter()
+    by_user = Counter()
+    for event in events:
+        day = event['date'].date()
+        by_device[day, event['user_device_type']] += 1
+        if event['user_id']:
+            by_user[event['user_id'], day] += 1
+    # Ключи сортируются, чтобы параллельные воркеры брали блокировки строк
+    # в одном порядке
+    _upsert(
+        connection,
+        device_stats,
+        ('day', 'user_device_type'),
+        [
+            {'day': day, 'user_device_type': device, 'count': count}
+            for (day, device), count in sorted(by_device.items())
+        ],
+    )
+    _upsert(
+        connection,
+        user_stats,
+        ('user_id', 'day'),
+        [
+            {'user_id': user_id, 'day': day, 'count': count}
+            for (user_id, day), count in sorted(by_user.items())
+        ],
+    )
+
+
+def rebuild_stats(connection, date_from: date, date_to: date):
+    """Пересчитывает агрегаты за [date_from, date_to) по самой истории."""
+    day = cast(History.date, Date).label('day')
+    period = (History.date >= date_from) & (History.date < date_to)
+    for table in (device_stats, user_stats):
+        connection.execute(table.delete().where(_period(table, date_from, date_to)))
+    connection.execute(
+        device_stats.insert().from_select(
+            ['day', 'user_device_type', 'count'],
+            select(day, History.user_device_type, func.count())
+            .where(period)
+            .group_by(day, History.user_device_type),
+        )
+    )
+    connection.execute(
+        user_stats.insert().from_select(
+            ['user_id', 'day', 'count'],
+            select(History.user_id, day, func.count())
+            .where(period & History.user_id.isnot(None))
+            .group_by(History.user_id, day),
+        )
+    )
+
+
+def get_stats(date_from: date, date_to: date, user_id: Optional[str] = None) -> dict:
+    """Агрегаты за [date_from, date_to), читаются только таблицы агрегатов."""
+    if user_id:
+        rows = db.session.execute(
+            select(user_stats.c.day, user_stats.c.count)
+            .where(user_stats.c.user_id == user_id)
+            .where(_period(user_stats, date_from, date_to))
+            .order_by(user_stats.c.day)
+        )
+        return {
+            'days': [{'day': day.isoformat(), 'count': count} for day, count in rows]
+        }
+
+    devices = db.session.execute(
+        select(device_stats.c.day, device_stats.c.user_device_type, device_stats.c.count)
+        .where(_period(device_stats, date_from, date_to))
+        .order_by(device_stats.c.day, device_stats.c.user_device_type)
+    )
+    active_users = db.session.execute(
+        select(user_stats.c.day, func.count())
+        .where(_period(user_stats, date_from, date_to))
+        .group_by(user_stats.c.day)
+        .order_by(user_stats.c.day)
+    )
+    return {
+        'devices': [
+            {'day': day.isoformat(), 'user_device_type': device, 'count': count}
+            for day, device, count in devices
+        ],
+        'active_users': [
+            {'day': day.isoformat(), 'users': users} for day, users in active_users
+        ],
+    }
+
+
+def default_period() -> tuple:
+    """Последние 30 дней, включая сегодняшний."""
+    today = datetime.utcnow().date()
+    return today - timedelta(days=30), today + timedelta(days=1)
+
+
+def _period(table, date_from: date, date_to: date):
+    return (table.c.day >= date_from) & (table.c.day < date_to)
+
+
+def _upsert(connection, table, keys: tuple, rows: list):
+    if not rows:
+        return
+    statement = insert(table).values(rows)
+    connection.execute(
+        statement.on_conflict_do_update(
+            index_elements=keys,
+            set_={'count': table.c.count + statement.excluded.count},
+        )
+    )
@@ -0,0 +1,192 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import Flask
+from gevent import monkey
+
+from db.pg_db import db
+from db.redis_db import redis_db
+from models.accounts import History
+from services.history_stats import update_stats
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryWriter:
+    """
+    Пишет историю входов в users_sign_in вне ответа на запрос. События
+    складываются в ограниченную очередь воркера, фоновый поток (гринлет под
+    gevent) забирает их пачками раз в flush_interval или по batch_size
+    и вставляет одним многострочным INSERT вместе с обновлением дневных
+    агрегатов (services.history_stats). Под gevent вставка идет в нативном
+    потоке: psycopg2 блокирует поток, и на hub она остановила бы все запросы
+    воркера. При переполнении очереди события отбрасываются и считаются
+    в dropped, остаток очереди дописывается при остановке воркера, если
+    поток записи освободится за shutdown_timeout секунд.
+    """
+
+    stats_key = 'history_writer:stats'
+
+    def __init__(self):
+        self.app = None
+        self.batch_size = 0
+        self.flush_interval = 0
+        self.max_queue = 0
+        self.shutdown_timeout = 0
+        self.last_flush_ms = 0
+        self.stats = Counter()
+        self._published = Counter()
+        self._queue = None
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app: Flask):
+        self.app = app
+        self.batch_size = app.config['HISTORY_BATCH_SIZE']
+        self.flush_interval = app.config['HISTORY_FLUSH_INTERVAL_MS'] / 1000
+        self.max_queue = app.config['HISTORY_MAX_QUEUE']
+        self.shutdown_timeout = app.config['HISTORY_SHUTDOWN_TIMEOUT']
+
+    def add(self, user_id: str, user_agent: str, info: str, user_device_type: str):
+        event = {
+            'user_id': user_id,
+            'user_agent': user_agent,
+            'info': info,
+            'user_device_type': user_device_type,
+            'date': datetime.utcnow(),
+        }
+        try:
+            self._get_queue().put_nowait(event)
+        except queue.Full:
+            self.stats['dropped'] += 1
+            return
+        self.stats['enqueued'] += 1
+
+    def flush(self):
+        """Дописывает все, что осталось в очереди (при остановке воркера)."""
+        if self._queue is None or self._pid != os.getpid():
+            return
+        # Поток записи может держать блокировку и не завершиться до выхода
+        if not self._lock.acquire(timeout=self.shutdown_timeout):
+            logger.error(
+                'История входов не дописана при остановке: %s событий',
+                self._queue.qsize(),
+            )
+            return
+        try:
+            while not self._queue.empty():
+                self._write(self._take(block=False))
+        finally:
+            self._lock.release()
+
+    def get_stats(self) -> dict:
+        """Локальные счетчики воркера и очередь в данный момент."""
+        return {
+            'queued': self._queue.qsize() if self._queue else 0,
+            'max_queue': self.max_queue,
+            'last_flush_ms': self.last_flush_ms,
+            **self.stats,
+        }
+
+    def get_shared_stats(self) -> dict:
+        """Счетчики всех воркеров из Redis, queued:<pid> - очередь воркера."""
+        stats = redis_db.hgetall(self.stats_key)
+        return {name.decode(): int(value) for name, value in stats.items()}
+
+    def _get_queue(self) -> queue.Queue:
+        # Очередь и поток записи создаются в каждом воркере после fork
+        pid = os.getpid()
+        if self._pid != pid:
+            self._pid = pid
+            self._queue = queue.Queue(self.max_queue)
+            self._pool = None
+            self.stats.clear()
+            self._published.clear()
+            if monkey.is_module_patched('threading'):
+                from gevent.threadpool import ThreadPool
+
+                # Один нативный поток: пачки пишутся по очереди
+                self._pool = ThreadPool(1)
+            threading.Thread(target=self._run, daemon=True).start()
+            atexit.register(self.flush)
+        return self._queue
+
+    def _run(self):
+        while True:
+            batch = self._take(block=True)
+            if batch:
+                # Поток записи и обработчик atexit не должны писать одновременно
+                with self._lock:
+                    self._write(batch)
+
+    def _take(self, block: bool) -> list:
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            try:
+                if block and not batch:
+                    # Ждем первое событие, с него отсчитывается flush_interval
+                    batch.append(self._queue.get())
+                    deadline = time.monotonic() + self.flush_interval
+                elif block and (timeout := deadline - time.monotonic()) > 0:
+                    batch.append(self._queue.get(timeout=timeout))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: list):
+        with self.app.app_context():
+            engine = db.engine
+        started = time.monotonic()
+        try:
+            if self._pool is None:
+                _insert(engine, batch)
+            else:
+                # Блокирует только гринлет записи
+                self._pool.apply(_insert, (engine, batch))
+        except Exception:
+            logger.exception('Не удалось записать историю входов')
+            self.stats['failed'] += len(batch)
+            return
+        self.stats['written'] += len(batch)
+        self.stats['batches'] += 1
+        self.last_flush_ms = int((time.monotonic() - started) * 1000)
+        # Redis - в гринлете: его соединения привязаны к hub воркера
+        self._publish_stats()
+
+    def _publish_stats(self):
+        # Общие счетчики всех воркеров для CLI, обновляются раз за пачку
+        try:
+            pipe = redis_db.pipeline(transaction=False)
+            for name in ('enqueued', 'dropped', 'written', 'failed', 'batches'):
+                delta = self.stats[name] - self._published[name]
+                pipe.hincrby(self.stats_key, name, delta)
+            pipe.hset(self.stats_key, f'queued:{self._pid}', self._queue.qsize())
+            pipe.execute()
+        except Exception:
+            logger.exception('Не удалось обновить статистику истории входов')
+            return
+        self._published = self.stats.copy()
+
+
+def _insert(engine, batch: list):
+    # executemany psycopg2 отправляет пачку одним INSERT ... VALUES
+    with engine.begin() as connection:
+        connection.execute(History.__table__.insert(), batch)
+        update_stats(connection, batch)
+
+
+history_writer = HistoryWriter()
+
+
+def init_history_writer(app: Flask):
+    history_writer.init_app(app)
@@ -0,0 +1,115 @@
+import math
+
+from flask import Flask
+
+from db.redis_db import rate_limit_redis
+
+# Регистрирует неудачную попытку входа для логина и IP.
+# Состояние - hash {count, locked_until} на логин и на IP плюс HyperLogLog
+# с IP, с которых подбирают пароль к логину. Все ключи живут ARGV[5] секунд
+# с последней ошибки, поэтому память ограничена числом активных атак.
+REGISTER_FAILURE_SCRIPT = """
+redis.replicate_commands()
+
+local ip = ARGV[1]
+local threshold = tonumber(ARGV[2])
+local base = tonumber(ARGV[3])
+local max_lockout = tonumber(ARGV[4])
+local ttl = tonumber(ARGV[5])
+local distinct_ips = tonumber(ARGV[6])
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local function fail(key, force)
+  local count = redis.call('HINCRBY', key, 'count', 1)
+  local locked_until = 0
+  if force then
+    locked_until = now + max_lockout
+  elseif count >= threshold then
+    locked_until = now + math.min(max_lockout, base * 2 ^ (count - threshold))
+  end
+  if locked_until > 0 then
+    redis.call('HSET', key, 'locked_until', locked_until)
+  end
+  redis.call('EXPIRE', key, ttl)
+  return locked_until
+end
+
+redis.call('PFADD', KEYS[3], ip)
+redis.call('EXPIRE', KEYS[3], ttl)
+local distributed = redis.call('PFCOUNT', KEYS[3]) >= distinct_ips
+
+local login_locked = fail(KEYS[1], distributed)
+local ip_locked = fail(KEYS[2], false)
+return math.max(login_locked, ip_locked) - now
+"""
+
+
+class LoginGuard:
+    """Экспоненциальная блокировка входа после серии неудачных попыток."""
+
+    key_prefix = 'login_guard'
+
+    def __init__(self):
+        self._register_failure = None
+        self.threshold = 0
+        self.base_lockout = 0
+        self.max_lockout = 0
+        self.ttl = 0
+        self.distinct_ips = 0
+
+    def init_app(self, app: Flask):
+        self._register_failure = rate_limit_redis.register_script(REGISTER_FAILURE_SCRIPT)
+        self.threshold = app.config['LOGIN_GUARD_THRESHOLD']
+        self.base_lockout = app.config['LOGIN_GUARD_BASE_LOCKOUT'] * 1000
+        self.max_lockout = app.config['LOGIN_GUARD_MAX_LOCKOUT'] * 1000
+        self.ttl = app.config['LOGIN_GUARD_TTL']
+        self.distinct_ips = app.config['LOGIN_GUARD_DISTINCT_IPS']
+
+    def _keys(self, login: str, ip: str):
+        return (
+            f'{self.key_prefix}:login:{login}',
+            f'{self.key_prefix}:ip:{ip}',
+            f'{self.key_prefix}:ips:{login}',
+        )
+
+    def get_retry_after(self, login: str, ip: str) -> int:
+        """Секунды до снятия блокировки (0 - можно проверять пароль)."""
+        login_key, ip_key, _ = self._keys(login, ip)
+        pipe = rate_limit_redis.pipeline(transaction=False)
+        pipe.time()
+        pipe.hget(login_key, 'locked_until')
+        pipe.hget(ip_key, 'locked_until')
+        (seconds, microseconds), login_locked, ip_locked = pipe.execute()
+        now = seconds * 1000 + microseconds // 1000
+        locked_until = max(int(login_locked or 0), int(ip_locked or 0))
+        return max(0, math.ceil((locked_until - now) / 1000))
+
+    def register_failure(self, login: str, ip: str) -> int:
+        """Учитывает неудачную попытку, возвращает секунды блокировки."""
+        lockout = self._register_failure(
+            keys=self._keys(login, ip),
+            args=[
+                ip,
+                self.threshold,
+                self.base_lockout,
+                self.max_lockout,
+                self.ttl,
+                self.distinct_ips,
+            ],
+        )
+        return max(0, math.ceil(lockout / 1000))
+
+    def reset(self, login: str, ip: str):
+        # Счетчик IP не сбрасываем: удачный вход в свой аккаунт
+        # не должен обнулять подбор паролей к чужим
+        login_key, _, ips_key = self._keys(login, ip)
+        rate_limit_redis.delete(login_key, ips_key)
+
+
+login_guard = LoginGuard()
+
+
+def init_login_guard(app: Flask):
+    login_guard.init_app(app)
@@ -0,0 +1,89 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Sequence
+
+from flask import request
+from marshmallow import ValidationError
+from sqlalchemy import DateTime, tuple_
+from sqlalchemy.dialects.postgresql import UUID
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class KeysetPage(NamedTuple):
+    items: List
+    next_cursor: Optional[str]
+    total: Optional[int]
+
+    @property
+    def meta(self) -> dict:
+        meta = {'next_cursor': self.next_cursor}
+        if self.total is not None:
+            meta['total'] = self.total
+        return meta
+
+
+def keyset_paginate(query, columns: Sequence, descending: bool = False) -> KeysetPage:
+    """
+    Страница query по ключу columns (последняя колонка уникальна) без OFFSET:
+    следующая страница начинается строго после ключа последней строки, поэтому
+    любая страница стоит как первая при индексе по тем же колонкам.
+    Параметры запроса: cursor, count (размер страницы), with_total.
+    """
+    limit = request.args.get('count', DEFAULT_PAGE_SIZE, type=int)
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    total = None
+    if request.args.get('with_total', type=_is_true):
+        # Подсчет по требованию, без него страница обходится без COUNT(*)
+        total = query.order_by(None).count()
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        key = tuple_(*columns)
+        values = tuple_(*_decode_cursor(cursor, columns))
+        query = query.filter(key < values if descending else key > values)
+    order = [column.desc() if descending else column.asc() for column in columns]
+    items = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = _encode_cursor([getattr(last, column.key) for column in columns])
+    return KeysetPage(items, next_cursor, total)
+
+
+def _is_true(value: str) -> bool:
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def _encode_cursor(values: list) -> str:
+    values = [
+        value.isoformat() if isinstance(value, datetime) else str(value)
+        for value in values
+    ]
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(cursor: str, columns: Sequence) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(cursor)
+        return [_parse(column, value) for column, value in zip(columns, values)]
+    except (binascii.Error, TypeError, ValueError):
+        raise ValidationError({'cursor': ['Некорректный курсор.']})
+
+
+def _parse(column, value: str):
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column.type, UUID):
+        return uuid.UUID(value)
+    return value
@@ -0,0 +1,103 @@
+import statistics
+import time
+from typing import Optional, Tuple
+
+from flask import Flask
+from passlib.context import CryptContext
+from werkzeug.security import check_password_hash
+
+SCHEMES = ('argon2', 'scrypt', 'pbkdf2_sha256')
+
+# Параметр стоимости, который подбирает autotune, его начальное значение
+# и шаг увеличения
+TUNABLE_PARAMS = {
+    'argon2': ('time_cost', 1, lambda value: value + 1),
+    'scrypt': ('rounds', 10, lambda value: value + 1),
+    'pbkdf2_sha256': ('rounds', 10000, lambda value: value * 2),
+}
+
+
+class PasswordHasher:
+    """
+    Реестр схем хеширования паролей поверх passlib. Новые хеши считаются
+    схемой PASSWORD_HASH_SCHEME с параметрами из PASSWORD_HASH_PARAMS.
+    Хеши других схем, старых параметров и хеши werkzeug проверяются как есть
+    и пересчитываются при удачном входе.
+    """
+
+    def __init__(self):
+        self.context = None
+        self.params = {}
+
+    def init_app(self, app: Flask):
+        self.params = app.config['PASSWORD_HASH_PARAMS']
+        self.context = make_context(app.config['PASSWORD_HASH_SCHEME'], self.params)
+
+    def hash(self, password: str) -> str:
+        return self.context.hash(password)
+
+    def verify(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """Возвращает (пароль верен, новый хеш или None, если пересчет не нужен)."""
+        if self.context.identify(hashed, required=False) is None:
+            # Хеш в формате werkzeug.security из первых версий сервиса
+            if not check_password_hash(hashed, password):
+                return False, None
+            return True, self.context.hash(password)
+        return self.context.verify_and_update(password, hashed)
+
+
+def make_context(default: str, params: dict) -> CryptContext:
+    settings = {}
+    for scheme, scheme_params in params.items():
+        for name, value in scheme_params.items():
+            settings[f'{scheme}__{name}'] = value
+        # Хеши с меньшим числом раундов verify_and_update считает устаревшими
+        rounds = scheme_params.get('rounds', scheme_params.get('time_cost'))
+        if rounds:
+            settings[f'{scheme}__min_rounds'] = rounds
+    # deprecated='auto' - хеши всех схем, кроме default, пересчитываются
+    return CryptContext(
+        schemes=SCHEMES, default=default, deprecated='auto', **settings
+    )
+
+
+def measure_verify(scheme: str, params: dict, samples: int = 3) -> float:
+    """Медианное время проверки пароля в секундах для схемы с параметрами."""
+    context = make_context(scheme, {scheme: params})
+    hashed = context.hash('benchmark-Password1')
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.verify('benchmark-Password1', hashed)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def autotune(scheme: str, params: dict, target: float) -> Tuple[dict, float]:
+    """
+    Подбирает параметр стоимости схемы так, чтобы проверка пароля на этом
+    железе занимала около target секунд. Остальные параметры не меняются.
+    """
+    name, value, step = TUNABLE_PARAMS[scheme]
+    previous = None
+    while True:
+        candidate = {**params, name: value}
+        elapsed = measure_verify(scheme, candidate)
+        if elapsed >= target:
+            break
+        previous = (candidate, elapsed)
+        value = step(value)
+    if scheme == 'pbkdf2_sha256':
+        # Время PBKDF2 линейно по числу раундов - уточняем пропорцией
+        candidate = {**params, name: int(value * target / elapsed)}
+        return candidate, measure_verify(scheme, candidate)
+    if previous and target - previous[1] < elapsed - target:
+        return previous
+    return candidate, elapsed
+
+
+password_hasher = PasswordHasher()
+
+
+def init_password_hasher(app: Flask):
+    password_hasher.init_app(app)
@@ -0,0 +1,238 @@
+import math
+import time
+from collections import Counter
+from typing import Dict, NamedTuple, Optional
+
+from flask import Flask, request
+
+from db.redis_db import rate_limit_redis
+from services.request_context import get_request_context
+
+# Token bucket: состояние хранится в hash {tokens, ts}, время берется из Redis,
+# чтобы все воркеры и поды считали по одним часам с точностью до миллисекунды.
+# ARGV[3] - сколько токенов запрошено; скрипт выдает столько, сколько есть
+# (но не больше запрошенного), что позволяет резервировать пачку токенов.
+TOKEN_BUCKET_SCRIPT = """
+redis.replicate_commands()
+
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil or ts == nil then
+  tokens = capacity
+  ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+local granted = math.min(requested, math.floor(tokens))
+local retry_after = 0
+if granted >= 1 then
+  tokens = tokens - granted
+else
+  granted = 0
+  retry_after = math.ceil((1 - tokens) / rate)
+end
+local reset = math.ceil((capacity - tokens) / rate)
+
+redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', key, math.max(reset, 1))
+return {granted, math.floor(tokens), reset, retry_after}
+"""
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    # Секунды до полного восстановления квоты
+    reset: int
+    # Секунды до появления следующего токена (0, если запрос пропущен)
+    retry_after: int
+
+    @property
+    def headers(self) -> dict:
+        headers = {
+            'X-RateLimit-Limit': str(self.limit),
+            'X-RateLimit-Remaining': str(self.remaining),
+            'X-RateLimit-Reset': str(self.reset),
+        }
+        if not self.allowed:
+            headers['Retry-After'] = str(self.retry_after)
+        return headers
+
+
+class RateLimitPolicy(NamedTuple):
+    # Общая корзина для всех запросов с одинаковым scope и ключом
+    scope: str
+    # Сколько запросов восстанавливается за window секунд
+    limit: int
+    window: int
+    # Емкость корзины - сколько запросов можно сделать подряд
+    burst: int
+    # 'user' - по user_id из токена (аноним - по IP), 'ip' - всегда по IP
+    key: str
+
+
+POLICY_KEYS = ('user', 'ip')
+
+
+def make_policy(scope: str, rule: dict, default: Optional[dict] = None) -> RateLimitPolicy:
+    rule = {**(default or {}), **rule}
+    limit = int(rule['limit'])
+    key = rule.get('key', 'user')
+    if key not in POLICY_KEYS:
+        raise ValueError(f'Неизвестный тип ключа rate limit: {key}')
+    return RateLimitPolicy(
+        scope=scope,
+        limit=limit,
+        window=int(rule.get('window', 60)),
+        burst=int(rule.get('burst', limit)),
+        key=key,
+    )
+
+
+PolicyTable = Dict[Optional[str], Dict[Optional[str], RateLimitPolicy]]
+
+
+def compile_policies(default: dict, endpoints: dict, roles: dict) -> PolicyTable:
+    """
+    Собирает таблицу {endpoint: {role: policy}} для поиска за O(1).
+    Ключ None - политика для пользователей без роли и анонимов.
+    """
+    table = {None: {None: make_policy('default', default)}}
+    for role, rule in roles.items():
+        table[None][role] = make_policy('default', rule, default)
+    for endpoint, rule in endpoints.items():
+        rule = dict(rule)
+        role_rules = rule.pop('roles', {})
+        base = make_policy(endpoint, rule, default)
+        table[endpoint] = {None: base}
+        for role, role_rule in role_rules.items():
+            table[endpoint][role] = make_policy(endpoint, role_rule, base._asdict())
+    return table
+
+
+class TokenLease:
+    """Пачка токенов, заранее списанная из общей корзины в Redis."""
+
+    __slots__ = ('tokens', 'expires_at', 'remaining', 'reset')
+
+    def __init__(self, tokens: int, expires_at: float, remaining: int, reset: int):
+        self.tokens = tokens
+        self.expires_at = expires_at
+        self.remaining = remaining
+        self.reset = reset
+
+
+class RateLimiter:
+    key_prefix = 'rate'
+    # Не резервируем больше этой доли лимита, чтобы один воркер
+    # не забирал всю квоту маленьких лимитов
+    max_lease_share = 0.1
+    max_leases = 10000
+
+    def __init__(self):
+        self._script = None
+        self._leases = {}
+        self.policies = {}
+        self.lease_size = 0
+        self.lease_ttl = 0
+        self.stats = Counter()
+
+    def init_app(self, app: Flask):
+        # Скрипт регистрируется один раз, дальше вызывается через EVALSHA
+        self._script = rate_limit_redis.register_script(TOKEN_BUCKET_SCRIPT)
+        self.policies = compile_policies(
+            {'limit': app.config['REQUEST_LIMIT_PER_MINUTE'], 'window': 60},
+            app.config['RATE_LIMIT_ENDPOINT_POLICIES'],
+            app.config['RATE_LIMIT_ROLE_POLICIES'],
+        )
+        self.lease_size = app.config['RATE_LIMIT_LOCAL_LEASE_SIZE']
+        self.lease_ttl = app.config['RATE_LIMIT_LOCAL_LEASE_TTL_MS'] / 1000
+
+    def get_policy(self, endpoint: Optional[str], role: Optional[str]) -> RateLimitPolicy:
+        policies = self.policies.get(endpoint) or self.policies[None]
+        return policies.get(role) or policies[None]
+
+    def hit(self, identity: str, policy: RateLimitPolicy) -> RateLimitResult:
+        key = f'{self.key_prefix}:{policy.scope}:{identity}'
+        lease_size = min(self.lease_size, int(policy.burst * self.max_lease_share))
+        if lease_size < 2:
+            _, result = self._acquire(key, policy, 1)
+            return result
+
+        now = time.monotonic()
+        lease = self._leases.get(key)
+        if lease and lease.tokens and lease.expires_at > now:
+            lease.tokens -= 1
+            self.stats['local'] += 1
+            return RateLimitResult(
+                allowed=True,
+                limit=policy.limit,
+                remaining=lease.remaining + lease.tokens,
+                reset=lease.reset,
+                retry_after=0,
+            )
+
+        granted, result = self._acquire(key, policy, lease_size)
+        if granted > 1:
+            if len(self._leases) >= self.max_leases:
+                self._purge(now)
+            self._leases[key] = TokenLease(
+                tokens=granted - 1,
+                expires_at=now + self.lease_ttl,
+                remaining=result.remaining,
+                reset=result.reset,
+            )
+            result = result._replace(remaining=result.remaining + granted - 1)
+        return result
+
+    def _acquire(self, key: str, policy: RateLimitPolicy, requested: int):
+        """Атомарно списывает до requested токенов из корзины за один round trip."""
+        rate = policy.limit / (policy.window * 1000)
+        granted, remaining, reset_ms, retry_after_ms = self._script(
+            keys=[key], args=[rate, policy.burst, requested]
+        )
+        self.stats['redis'] += 1
+        return granted, RateLimitResult(
+            allowed=granted > 0,
+            limit=policy.limit,
+            remaining=remaining,
+            reset=math.ceil(reset_ms / 1000),
+            retry_after=math.ceil(retry_after_ms / 1000),
+        )
+
+    def _purge(self, now: float):
+        self._leases = {
+            key: lease for key, lease in self._leases.items() if lease.expires_at > now
+        }
+        if len(self._leases) >= self.max_leases:
+            self._leases.clear()
+
+
+def check_rate_limit() -> RateLimitResult:
+    """Выбирает политику для текущего запроса и списывает из ее корзины токен."""
+    claims = get_request_context().jwt
+    policy = rate_limiter.get_policy(request.endpoint, claims.get('role'))
+    user_id = claims.get('user_id')
+    if policy.key == 'user' and user_id:
+        identity = f'user:{user_id}'
+    else:
+        # remote_addr уже учитывает X-Forwarded-For от доверенного прокси (ProxyFix)
+        identity = f'ip:{request.remote_addr}'
+    return rate_limiter.hit(identity, policy)
+
+
+rate_limiter = RateLimiter()
+
+
+def init_rate_limiter(app: Flask):
+    rate_limiter.init_app(app)
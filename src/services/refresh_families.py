@@ -0,0 +1,75 @@
+from typing import Optional
+
+from flask import Flask
+
+from db.redis_db import redis_db
+
+# Ротация refresh токена: в семье действителен только последний выданный jti.
+# 1 - ротация выполнена, 0 - семьи нет (отозвана или истекла),
+# -1 - предъявлен уже использованный токен, семья удалена.
+ROTATE_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], 'current')
+if not current then
+  return {0, 0}
+end
+if current ~= ARGV[1] then
+  local exp = redis.call('HGET', KEYS[1], 'exp')
+  redis.call('DEL', KEYS[1])
+  return {-1, tonumber(exp)}
+end
+redis.call('HSET', KEYS[1], 'current', ARGV[2], 'exp', ARGV[3])
+redis.call('EXPIREAT', KEYS[1], ARGV[3])
+return {1, tonumber(ARGV[3])}
+"""
+
+# Удаляет семью и возвращает exp последнего refresh токена
+DELETE_SCRIPT = """
+local exp = redis.call('HGET', KEYS[1], 'exp')
+redis.call('DEL', KEYS[1])
+return tonumber(exp)
+"""
+
+ROTATED = 1
+REUSED = -1
+
+
+class RefreshFamilies:
+    """
+    Семьи refresh токенов: одна семья на вход пользователя, один hash
+    {current, exp, user_id} в Redis на семью. Hash живет ровно до exp
+    последнего refresh токена семьи.
+    """
+
+    key_prefix = 'refresh_family'
+
+    def __init__(self):
+        self._rotate = None
+        self._delete = None
+
+    def init_app(self, app: Flask):
+        self._rotate = redis_db.register_script(ROTATE_SCRIPT)
+        self._delete = redis_db.register_script(DELETE_SCRIPT)
+
+    def start(self, family: str, user_id: str, jti: str, exp: int):
+        key = f'{self.key_prefix}:{family}'
+        pipe = redis_db.pipeline()
+        pipe.hset(key, mapping={'current': jti, 'exp': exp, 'user_id': user_id})
+        pipe.expireat(key, exp)
+        pipe.execute()
+
+    def rotate(self, family: str, jti: str, new_jti: str, new_exp: int):
+        """Возвращает (статус, exp семьи) - см. ROTATE_SCRIPT."""
+        status, exp = self._rotate(
+            keys=[f'{self.key_prefix}:{family}'], args=[jti, new_jti, new_exp]
+        )
+        return status, exp
+
+    def delete(self, family: str) -> Optional[int]:
+        return self._delete(keys=[f'{self.key_prefix}:{family}'])
+
+
+refresh_families = RefreshFamilies()
+
+
+def init_refresh_families(app: Flask):
+    refresh_families.init_app(app)
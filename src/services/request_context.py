@@ -0,0 +1,120 @@
+import functools
+from collections import Counter
+from typing import Optional
+
+from flask import current_app, g, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+from flask_jwt_extended.exceptions import (JWTExtendedException,
+                                           NoAuthorizationError)
+from jwt.exceptions import PyJWTError
+
+from services.user_cache import CachedUser, user_cache
+
+
+class RequestContext:
+    """
+    Данные запроса, которые нужны нескольким хукам и представлениям:
+    проверенный JWT, тело запроса и пользователь. Каждое значение
+    вычисляется лениво и не больше одного раза за запрос.
+    """
+
+    def __init__(self):
+        self._values = {}
+        self.jwt_error = None
+        # Сколько раз выполнена проверка токена, разбор тела и поиск
+        # пользователя, в DEBUG проверяется в teardown
+        self.computations = Counter()
+
+    def _resolve(self, name: str, factory):
+        if name not in self._values:
+            self._values[name] = factory()
+        return self._values[name]
+
+    @property
+    def jwt(self) -> dict:
+        """Claims проверенного токена или {}, если токена нет или он невалиден."""
+        return self._resolve('jwt', self._decode_jwt)
+
+    @property
+    def body(self) -> dict:
+        return self._resolve('body', self._parse_body)
+
+    @property
+    def user(self) -> Optional[CachedUser]:
+        return self._resolve('user', self._load_user)
+
+    def set_user(self, user: CachedUser):
+        """Пользователь уже известен представлению (например, после проверки пароля)."""
+        self._values['user'] = user
+
+    def verify_jwt(self, optional: bool = False):
+        """Поведение verify_jwt_in_request без повторной проверки токена."""
+        if self.jwt or not self.jwt_error:
+            return
+        # Как verify_jwt_in_request(optional=True): отсутствие токена
+        # допустимо, некорректный заголовок или токен - нет
+        if optional and isinstance(self.jwt_error, NoAuthorizationError):
+            return
+        raise self.jwt_error
+
+    def _decode_jwt(self) -> dict:
+        view = current_app.view_functions.get(request.endpoint)
+        self.computations['jwt'] += 1
+        try:
+            verify_jwt_in_request(refresh=getattr(view, 'jwt_refresh', False))
+        except (JWTExtendedException, PyJWTError) as e:
+            self.jwt_error = e
+            return {}
+        return get_jwt()
+
+    def _parse_body(self) -> dict:
+        self.computations['body'] += 1
+        return request.get_json(silent=True) or {}
+
+    def _load_user(self) -> Optional[CachedUser]:
+        login = self.jwt.get(current_app.config['JWT_IDENTITY_CLAIM'])
+        if not login:
+            login = self.body.get('login')
+        if not login:
+            return None
+        self.computations['user'] += 1
+        return user_cache.get_by_login(login)
+
+
+def get_request_context() -> RequestContext:
+    if 'request_context' not in g:
+        g.request_context = RequestContext()
+    return g.request_context
+
+
+def jwt_required(optional: bool = False, refresh: bool = False):
+    """Аналог flask_jwt_extended.jwt_required, токен проверяется один раз за запрос."""
+
+    def wrapper(fn):
+        @functools.wraps(fn)
+        def decorator(*args, **kwargs):
+            get_request_context().verify_jwt(optional=optional)
+            return fn(*args, **kwargs)
+
+        # Тип токена нужен контексту до вызова представления (в before_request)
+        decorator.jwt_refresh = refresh
+        return decorator
+
+    return wrapper
+
+
+def request_context_headers(response):
+    """В DEBUG отдает счетчики вычислений контекста (для функциональных тестов)."""
+    context = g.get('request_context')
+    if context:
+        response.headers['X-Request-Context'] = ','.join(
+            f'{name}={count}' for name, count in sorted(context.computations.items())
+        )
+    return response
+
+
+def check_request_context(exc=None):
+    context = g.get('request_context')
+    if context:
+        repeated = {name: count for name, count in context.computations.items() if count > 1}
+        assert not repeated, f'Значения запроса вычислены повторно: {repeated}'
@@ -0,0 +1,186 @@
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Iterable
+
+from redis.exceptions import RedisError
+
+from db.redis_db import redis_db
+from services.auth_changes import (TOKEN_REVOKED, USER_GENERATION,
+                                   USER_VERSION, auth_changes)
+
+logger = logging.getLogger(__name__)
+
+CHANGE_TYPES = {'ver': USER_VERSION, 'gen': USER_GENERATION}
+
+
+class RevokedTokens:
+    """
+    Локальная копия множества отозванных jti и счетчиков пользователей.
+
+    Источник правды - Redis: ключ jti (как и раньше), sorted set {jti: exp}
+    и hash-и {user_id: счетчик} для версии claims (ver) и поколения
+    сессий (gen). Воркер загружает их при старте, изменения приходят через
+    pub/sub. Пока подписка не установлена, проверка идет в Redis, поэтому
+    отзыв не теряется при переподключении.
+    """
+
+    key = 'revoked_tokens'
+    versions_key = 'token_versions'
+    generations_key = 'token_generations'
+    channel = 'revoked_tokens'
+    prune_interval = 60
+    retry_interval = 1
+
+    def __init__(self):
+        self._revoked = {}
+        self._versions = {}
+        self._generations = {}
+        self._synced = False
+        self._pid = None
+        self._pruned_at = 0
+        self.stats = Counter()
+
+    def revoke(self, jti: str, exp: int):
+        """
+        Отзывает токен (или семью токенов по fam) до exp:
+        запись в Redis и рассылка воркерам за один round trip.
+        """
+        now = int(time.time())
+        pipe = redis_db.pipeline()
+        pipe.set(jti, '', ex=max(1, exp - now))
+        pipe.zadd(self.key, {jti: exp})
+        pipe.zremrangebyscore(self.key, '-inf', now)
+        pipe.publish(self.channel, f'jti:{jti}:{exp}')
+        auth_changes.add(pipe, TOKEN_REVOKED, jti=jti, exp=exp)
+        pipe.execute()
+        self._revoked[jti] = exp
+
+    def get_counters(self, user_id: str) -> dict:
+        """Текущие ver и gen пользователя для выпуска нового токена."""
+        pipe = redis_db.pipeline(transaction=False)
+        pipe.hget(self.versions_key, user_id)
+        pipe.hget(self.generations_key, user_id)
+        version, generation = pipe.execute()
+        return {'ver': int(version or 0), 'gen': int(generation or 0)}
+
+    def bump_versions(self, user_ids: Iterable[str]):
+        """
+        Делает устаревшими access токены пользователей, например после смены роли.
+        Refresh токены остаются рабочими и выпускают access с новыми claims.
+        """
+        self._bump(self.versions_key, 'ver', self._versions, user_ids)
+
+    def bump_generation(self, user_id: str):
+        """Отзывает все токены пользователя (выход на всех устройствах) одной записью."""
+        self._bump(self.generations_key, 'gen', self._generations, [user_id])
+
+    def _bump(self, key: str, kind: str, local: dict, user_ids: Iterable[str]):
+        user_ids = [str(user_id) for user_id in user_ids]
+        if not user_ids:
+            return
+        pipe = redis_db.pipeline()
+        for user_id in user_ids:
+            pipe.hincrby(key, user_id, 1)
+        counters = pipe.execute()
+        pipe = redis_db.pipeline()
+        for user_id, counter in zip(user_ids, counters):
+            pipe.publish(self.channel, f'{kind}:{user_id}:{counter}')
+            auth_changes.add(
+                pipe, CHANGE_TYPES[kind], user_ids=[user_id], counter=counter
+            )
+            local[user_id] = counter
+        pipe.execute()
+
+    @property
+    def synced(self) -> bool:
+        """Локальная копия актуальна: is_revoked не обращается к Redis."""
+        self._ensure_listener()
+        return self._synced
+
+    def is_revoked(self, jwt_payload: dict) -> bool:
+        self._ensure_listener()
+        jti = jwt_payload['jti']
+        user_id = jwt_payload.get('user_id')
+        if self._synced:
+            self.stats['local'] += 1
+            revoked = jti in self._revoked or jwt_payload.get('fam') in self._revoked
+            version = self._versions.get(user_id, 0)
+            generation = self._generations.get(user_id, 0)
+        else:
+            self.stats['redis'] += 1
+            pipe = redis_db.pipeline(transaction=False)
+            pipe.exists(jti, jwt_payload.get('fam') or jti)
+            pipe.hget(self.versions_key, user_id or '')
+            pipe.hget(self.generations_key, user_id or '')
+            revoked, version, generation = pipe.execute()
+            revoked = revoked > 0
+            version = int(version or 0)
+            generation = int(generation or 0)
+        if revoked or jwt_payload.get('gen', 0) < generation:
+            return True
+        return jwt_payload['type'] == 'access' and jwt_payload.get('ver', 0) < version
+
+    def _ensure_listener(self):
+        # Поток подписки запускаем в каждом воркере отдельно (после fork)
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        self._pid = pid
+        self._synced = False
+        threading.Thread(target=self._listen, daemon=True).start()
+
+    def _listen(self):
+        while True:
+            pubsub = redis_db.pubsub(ignore_subscribe_messages=True)
+            try:
+                # Сначала подписка, потом загрузка - чтобы не пропустить отзывы между ними
+                pubsub.subscribe(self.channel)
+                self._bootstrap()
+                self._synced = True
+                while True:
+                    message = pubsub.get_message(timeout=self.prune_interval)
+                    if message:
+                        self._apply(message['data'].decode())
+                    self._prune()
+            except RedisError:
+                logger.exception('Подписка на отозванные токены прервана')
+            finally:
+                self._synced = False
+                pubsub.close()
+            time.sleep(self.retry_interval)
+
+    def _apply(self, message: str):
+        kind, key, value = message.split(':')
+        if kind == 'jti':
+            self._revoked[key] = int(value)
+        elif kind == 'ver':
+            self._versions[key] = max(int(value), self._versions.get(key, 0))
+        elif kind == 'gen':
+            self._generations[key] = max(int(value), self._generations.get(key, 0))
+
+    def _bootstrap(self):
+        now = int(time.time())
+        pipe = redis_db.pipeline(transaction=False)
+        pipe.zrangebyscore(self.key, now, '+inf', withscores=True)
+        pipe.hgetall(self.versions_key)
+        pipe.hgetall(self.generations_key)
+        revoked, versions, generations = pipe.execute()
+        self._revoked.update({jti.decode(): int(exp) for jti, exp in revoked})
+        for local, counters in ((self._versions, versions), (self._generations, generations)):
+            local.update(
+                {user_id.decode(): int(counter) for user_id, counter in counters.items()}
+            )
+        self._pruned_at = now
+
+    def _prune(self):
+        now = int(time.time())
+        if now - self._pruned_at < self.prune_interval:
+            return
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        self._pruned_at = now
+
+
+revoked_tokens = RevokedTokens()
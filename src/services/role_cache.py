@@ -0,0 +1,91 @@
+import time
+from types import MappingProxyType
+from typing import NamedTuple, Optional, Tuple
+
+from flask import Flask
+
+from db.redis_db import redis_db
+from models.rbac import Role
+
+
+class CachedRole(NamedTuple):
+    id: str
+    name: str
+    description: Optional[str]
+    permissions: Tuple[str, ...]
+
+
+class RoleCache:
+    """
+    Таблица ролей в памяти воркера: неизменяемые словари по id и по имени.
+    Любое изменение ролей увеличивает версию в Redis, воркер сверяет ее
+    не чаще раза в check_interval секунд и перечитывает таблицу целиком.
+    Промах сверяет версию сразу: роль могла быть создана в другом воркере.
+    """
+
+    version_key = 'roles:version'
+
+    def __init__(self):
+        self.check_interval = 0
+        self._version = None
+        self._checked_at = 0
+        self._by_id = MappingProxyType({})
+        self._by_name = MappingProxyType({})
+
+    def init_app(self, app: Flask):
+        self.check_interval = app.config['ROLE_CACHE_CHECK_INTERVAL']
+
+    def get_by_id(self, role_id) -> Optional[CachedRole]:
+        if role_id is None:
+            return None
+        self._ensure_fresh()
+        role = self._by_id.get(str(role_id))
+        if role is None and self._ensure_fresh(force=True):
+            role = self._by_id.get(str(role_id))
+        return role
+
+    def get_by_name(self, name: str) -> Optional[CachedRole]:
+        self._ensure_fresh()
+        role = self._by_name.get(name)
+        if role is None and self._ensure_fresh(force=True):
+            role = self._by_name.get(name)
+        return role
+
+    def bump(self):
+        """Вызывается после коммита любого изменения таблицы role."""
+        redis_db.incr(self.version_key)
+        self._checked_at = 0
+
+    def _ensure_fresh(self, force: bool = False) -> bool:
+        """Сверяет версию таблицы, True - таблица перечитана."""
+        now = time.monotonic()
+        fresh = now - self._checked_at < self.check_interval
+        if self._version is not None and fresh and not force:
+            return False
+        self._checked_at = now
+        version = int(redis_db.get(self.version_key) or 0)
+        if version == self._version:
+            return False
+        self._load(version)
+        return True
+
+    def _load(self, version: int):
+        roles = [
+            CachedRole(
+                id=str(role.id),
+                name=role.name,
+                description=role.description,
+                permissions=tuple(role.permissions or ()),
+            )
+            for role in Role.query.all()
+        ]
+        self._by_id = MappingProxyType({role.id: role for role in roles})
+        self._by_name = MappingProxyType({role.name: role for role in roles})
+        self._version = version
+
+
+role_cache = RoleCache()
+
+
+def init_role_cache(app: Flask):
+    role_cache.init_app(app)
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import logging
+import os
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from flask import Flask
+from flask_jwt_extended import JWTManager
+from jwt.algorithms import get_default_algorithms
+from jwt.exceptions import InvalidTokenError
+
+logger = logging.getLogger(__name__)
+
+# Тип приватного ключа для каждого алгоритма подписи
+KEY_TYPES = {
+    'RS256': rsa.RSAPrivateKey,
+    'EdDSA': ed25519.Ed25519PrivateKey,
+}
+ASYMMETRIC_ALGORITHMS = tuple(KEY_TYPES)
+
+
+class SigningKeys:
+    """
+    Набор ключей подписи JWT из каталога JWT_SIGNING_KEYS_DIR.
+
+    Каждый файл <kid>.pem - приватный ключ. Подписывает ключ с наибольшим kid,
+    проверка принимает все ключи из каталога. Ротация: положить новый ключ,
+    перезапустить воркеры, а старый удалить после JWT_REFRESH_TOKEN_EXPIRES.
+    """
+
+    def __init__(self):
+        self.algorithm = None
+        self.current_kid = None
+        self.private_keys = {}
+        self.public_keys = {}
+        self.jwks = json.dumps({'keys': []}).encode()
+        self.etag = hashlib.sha256(self.jwks).hexdigest()
+
+    def load(self, directory: str, algorithm: str) -> bool:
+        """Загружает ключи, False - в каталоге нет ни одного ключа."""
+        self.algorithm = algorithm
+        to_jwk = get_default_algorithms()[algorithm].to_jwk
+        keys = []
+        names = sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+        for name in names:
+            kid, ext = os.path.splitext(name)
+            if ext != '.pem':
+                continue
+            with open(os.path.join(directory, name), 'rb') as key_file:
+                private_key = serialization.load_pem_private_key(
+                    key_file.read(), password=None
+                )
+            if not isinstance(private_key, KEY_TYPES[algorithm]):
+                raise RuntimeError(
+                    f'Ключ {name} в {directory} не подходит для подписи {algorithm}'
+                )
+            public_key = private_key.public_key()
+            self.private_keys[kid] = private_key
+            self.public_keys[kid] = public_key
+            jwk = json.loads(to_jwk(public_key))
+            jwk.update(kid=kid, alg=algorithm, use='sig')
+            keys.append(jwk)
+        if not keys:
+            return False
+        self.current_kid = max(self.private_keys)
+        self.jwks = json.dumps({'keys': keys}, sort_keys=True).encode()
+        self.etag = hashlib.sha256(self.jwks).hexdigest()
+        return True
+
+    def get_private_key(self):
+        if self.current_kid is None:
+            raise RuntimeError(
+                f'Нет ключей подписи {self.algorithm}, '
+                'создайте ключ командой flask jwks generate_key'
+            )
+        return self.private_keys[self.current_kid]
+
+    def get_public_key(self, kid: str):
+        try:
+            return self.public_keys[kid]
+        except KeyError:
+            raise InvalidTokenError(f'Неизвестный ключ подписи {kid}')
+
+
+def generate_private_key(algorithm: str) -> bytes:
+    if algorithm == 'EdDSA':
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+
+
+signing_keys = SigningKeys()
+
+
+def init_signing_keys(app: Flask, jwt: JWTManager):
+    """Включает асимметричную подпись; для HS256 остается JWT_SECRET_KEY."""
+    algorithm = app.config['JWT_ALGORITHM']
+    if algorithm not in ASYMMETRIC_ALGORITHMS:
+        return
+    directory = app.config['JWT_SIGNING_KEYS_DIR']
+    if not signing_keys.load(directory, algorithm):
+        # Приложение поднимается и без ключей, иначе flask jwks generate_key
+        # не сможет создать первый ключ. Выпуск токенов до этого невозможен.
+        logger.error(
+            'В %s нет ключей подписи %s, выполните flask jwks generate_key',
+            directory,
+            algorithm,
+        )
+
+    @jwt.encode_key_loader
+    def encode_key(identity):
+        return signing_keys.get_private_key()
+
+    @jwt.additional_headers_loader
+    def kid_header(identity):
+        return {'kid': signing_keys.current_kid}
+
+    @jwt.decode_key_loader
+    def decode_key(jwt_header, jwt_payload):
+        return signing_keys.get_public_key(jwt_header.get('kid'))
@@ -0,0 +1,82 @@
+import uuid
+from typing import Optional, Tuple
+
+import jwt
+from flask_jwt_extended import create_access_token, create_refresh_token
+
+from models.accounts import User
+from services.refresh_families import REUSED, ROTATED, refresh_families
+from services.revoked_tokens import revoked_tokens
+from services.role_cache import role_cache
+
+
+def get_user_claims(user) -> dict:
+    """
+    Дополнительные claims, по которым сервис узнает пользователя и его права
+    без запроса в БД. ver - версия claims, после смены роли старые access
+    токены отклоняются и перевыпускаются через /refresh. gen - поколение
+    сессий, его увеличение отзывает все токены пользователя.
+    """
+    role = role_cache.get_by_id(user.role_id)
+    return {
+        'user_id': str(user.id),
+        'role': role.name if role else None,
+        'permissions': list(role.permissions) if role else [],
+        **revoked_tokens.get_counters(str(user.id)),
+    }
+
+
+def _issue_tokens(user, family: str) -> Tuple[str, str, dict]:
+    claims = {**get_user_claims(user), 'fam': family}
+    access_token = create_access_token(identity=user.login, additional_claims=claims)
+    refresh_token = create_refresh_token(identity=user.login, additional_claims=claims)
+    # Токен только что подписан нами, проверять подпись не нужно
+    refresh_claims = jwt.decode(refresh_token, options={'verify_signature': False})
+    return access_token, refresh_token, refresh_claims
+
+
+def create_tokens(user) -> Tuple[str, str]:
+    """Выпускает пару токенов и начинает новую семью refresh токенов."""
+    family = str(uuid.uuid4())
+    access_token, refresh_token, refresh_claims = _issue_tokens(user, family)
+    refresh_families.start(
+        family, str(user.id), refresh_claims['jti'], refresh_claims['exp']
+    )
+    return access_token, refresh_token
+
+
+def rotate_tokens(user, refresh_claims: dict) -> Optional[Tuple[str, str]]:
+    """
+    Меняет refresh токен на новую пару. Повторное предъявление уже
+    использованного токена считается кражей: отзывается вся семья,
+    включая выданные ей access токены. Возвращает None, если семья отозвана.
+    """
+    family = refresh_claims.get('fam')
+    if not family:
+        # Токен выпущен до появления семей: отзываем его, как до ротации,
+        # иначе его можно предъявлять повторно до истечения
+        revoked_tokens.revoke(refresh_claims['jti'], refresh_claims['exp'])
+        return create_tokens(user)
+    access_token, refresh_token, new_claims = _issue_tokens(user, family)
+    status, exp = refresh_families.rotate(
+        family, refresh_claims['jti'], new_claims['jti'], new_claims['exp']
+    )
+    if status == REUSED:
+        revoked_tokens.revoke(family, exp)
+    if status != ROTATED:
+        return None
+    return access_token, refresh_token
+
+
+def revoke_family(family: str):
+    """Отзывает семью: refresh токены и выданные ей access токены."""
+    exp = refresh_families.delete(family)
+    if exp:
+        revoked_tokens.revoke(family, exp)
+
+
+def has_role(claims: dict, required_role: str) -> bool:
+    if 'role' not in claims:
+        # Токен выпущен до появления роли в claims
+        return User.check_role(login=claims['sub'], required_role=required_role)
+    return claims['role'] == required_role
@@ -0,0 +1,123 @@
+import json
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from flask import Flask
+
+from db.redis_db import redis_db
+from models.accounts import User
+
+
+class CachedUser(NamedTuple):
+    id: str
+    login: str
+    role_id: Optional[str]
+    email: Optional[str]
+    name: Optional[str]
+
+    @classmethod
+    def from_model(cls, user: User) -> 'CachedUser':
+        return cls(
+            id=str(user.id),
+            login=user.login,
+            role_id=str(user.role_id) if user.role_id else None,
+            email=user.email,
+            name=user.name,
+        )
+
+
+class UserCache:
+    """
+    Read-through кеш пользователя в Redis. Запись хранится под двумя ключами
+    (по login и по id), поэтому любой поиск - один GET. Изменения пользователя
+    должны вызывать invalidate, TTL страхует от пропущенной инвалидации.
+    """
+
+    key_prefix = 'user'
+    stats_key = 'user_cache:stats'
+
+    def __init__(self):
+        self.ttl = 0
+
+    def init_app(self, app: Flask):
+        self.ttl = app.config['USER_CACHE_TTL']
+
+    def get_by_login(self, login: str) -> Optional[CachedUser]:
+        return self._get(f'{self.key_prefix}:login:{login}', User.login == login)
+
+    def get_by_id(self, user_id: str) -> Optional[CachedUser]:
+        return self._get(f'{self.key_prefix}:id:{user_id}', User.id == user_id)
+
+    def get_many_by_login(self, logins: Iterable[str]) -> Dict[str, CachedUser]:
+        """Один MGET на все логины и один запрос IN для промахов."""
+        logins = list(dict.fromkeys(logins))
+        if not logins:
+            return {}
+        pipe = redis_db.pipeline(transaction=False)
+        pipe.mget([f'{self.key_prefix}:login:{login}' for login in logins])
+        pipe.hincrby(self.stats_key, 'lookups', len(logins))
+        cached, _ = pipe.execute()
+        users = {
+            login: CachedUser(*json.loads(record))
+            for login, record in zip(logins, cached)
+            if record is not None
+        }
+        missing = [login for login in logins if login not in users]
+        if not missing:
+            return users
+
+        pipe = redis_db.pipeline(transaction=False)
+        pipe.hincrby(self.stats_key, 'misses', len(missing))
+        for user in User.query.filter(User.login.in_(missing)):
+            user = CachedUser.from_model(user)
+            users[user.login] = user
+            self._set(pipe, user)
+        pipe.execute()
+        return users
+
+    def _get(self, key: str, criterion) -> Optional[CachedUser]:
+        # Счетчик обращений едет в том же round trip, промахи считаются отдельно
+        pipe = redis_db.pipeline(transaction=False)
+        pipe.get(key)
+        pipe.hincrby(self.stats_key, 'lookups', 1)
+        cached, _ = pipe.execute()
+        if cached is not None:
+            return CachedUser(*json.loads(cached))
+
+        user = User.query.filter(criterion).first()
+        pipe = redis_db.pipeline(transaction=False)
+        pipe.hincrby(self.stats_key, 'misses', 1)
+        if user:
+            user = CachedUser.from_model(user)
+            self._set(pipe, user)
+        pipe.execute()
+        return user
+
+    def _set(self, pipe, user: CachedUser):
+        record = json.dumps(user, separators=(',', ':'))
+        pipe.set(f'{self.key_prefix}:login:{user.login}', record, ex=self.ttl)
+        pipe.set(f'{self.key_prefix}:id:{user.id}', record, ex=self.ttl)
+
+    def invalidate(self, user_id: str, login: str):
+        self.invalidate_many([(user_id, login)])
+
+    def invalidate_many(self, users: Iterable[Tuple[str, str]]):
+        """Удаляет записи пользователей, users - пары (id, login)."""
+        keys = []
+        for user_id, login in users:
+            keys.append(f'{self.key_prefix}:id:{user_id}')
+            keys.append(f'{self.key_prefix}:login:{login}')
+        if keys:
+            redis_db.delete(*keys)
+
+    def get_stats(self) -> dict:
+        stats = redis_db.hgetall(self.stats_key)
+        lookups = int(stats.get(b'lookups', 0))
+        misses = int(stats.get(b'misses', 0))
+        return {'lookups': lookups, 'hits': lookups - misses, 'misses': misses}
+
+
+user_cache = UserCache()
+
+
+def init_user_cache(app: Flask):
+    user_cache.init_app(app)
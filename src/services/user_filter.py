@@ -0,0 +1,156 @@
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Optional
+
+from flask import Flask
+from redis.exceptions import RedisError
+from sqlalchemy.exc import SQLAlchemyError
+
+from db.pg_db import db
+from db.redis_db import redis_db
+from models.accounts import User
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, item: str):
+        for index in self._indexes(item):
+            self.bits[index >> 3] |= 1 << (index & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[index >> 3] & (1 << (index & 7)) for index in self._indexes(item)
+        )
+
+    def _indexes(self, item: str):
+        # Двойное хеширование: k индексов из двух 64-битных половин одного хеша
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+
+class UserFilter:
+    """
+    Фильтр Блума id пользователей в процессе gRPC сервера. Строится потоковым
+    чтением таблицы user, новые пользователи приходят через pub/sub
+    (подписка оформляется до чтения таблицы, чтобы не потерять регистрации
+    между ними). Отрицательный ответ фильтра точен, положительный
+    подтверждается запросом по первичному ключу, поэтому удаленные
+    пользователи в фильтре дают только лишний запрос.
+    """
+
+    channel = 'users:created'
+    retry_interval = 1
+
+    def __init__(self):
+        self.app = None
+        self.capacity = 0
+        self.error_rate = 0
+        self.scan_chunk = 0
+        self.stats = Counter()
+        self._filter = None
+        self._ready = False
+        self._pid = None
+
+    def init_app(self, app: Flask):
+        self.app = app
+        self.capacity = app.config['USER_FILTER_CAPACITY']
+        self.error_rate = app.config['USER_FILTER_ERROR_RATE']
+        self.scan_chunk = app.config['USER_FILTER_SCAN_CHUNK']
+
+    def start(self):
+        """Начинает построение фильтра в фоне, не дожидаясь первого запроса."""
+        self._ensure_listener()
+
+    def might_exist(self, user_id: str) -> Optional[bool]:
+        """False - пользователя точно нет, None - фильтр еще не построен."""
+        self._ensure_listener()
+        if not self._ready:
+            return None
+        if user_id in self._filter:
+            self.stats['maybe'] += 1
+            return True
+        self.stats['negative'] += 1
+        return False
+
+    @classmethod
+    def publish_created(cls, user_id):
+        """
+        Вызывается после коммита нового пользователя. Ошибка Redis не должна
+        ломать регистрацию: фильтры после переподключения строятся заново.
+        """
+        try:
+            redis_db.publish(cls.channel, str(user_id))
+        except RedisError:
+            logger.exception('Не удалось разослать нового пользователя %s', user_id)
+
+    def _ensure_listener(self):
+        # Фильтр строится в каждом процессе отдельно (после fork)
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        self._pid = pid
+        self._ready = False
+        threading.Thread(target=self._listen, daemon=True).start()
+
+    def _listen(self):
+        while True:
+            pubsub = redis_db.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.channel)
+                self._filter = self._build()
+                self._ready = True
+                for message in pubsub.listen():
+                    self._filter.add(message['data'].decode())
+            except (RedisError, SQLAlchemyError):
+                logger.exception('Подписка на новых пользователей прервана')
+            finally:
+                # Регистрации за время разрыва могли потеряться - фильтр
+                # строится заново после переподключения
+                self._ready = False
+                pubsub.close()
+            time.sleep(self.retry_interval)
+
+    def _build(self) -> BloomFilter:
+        started = time.monotonic()
+        with self.app.app_context():
+            count = User.query.count()
+            # Запас на рост без перестроения
+            bloom = BloomFilter(max(self.capacity, count * 2), self.error_rate)
+            for (user_id,) in db.session.query(User.id).yield_per(self.scan_chunk):
+                bloom.add(str(user_id))
+            db.session.remove()
+        logger.info(
+            'Фильтр пользователей построен: %s записей за %.2f с',
+            count,
+            time.monotonic() - started,
+        )
+        return bloom
+
+
+def normalize_user_id(user_id: str) -> Optional[str]:
+    """Каноническая запись UUID или None для некорректного id."""
+    try:
+        return str(uuid.UUID(user_id))
+    except ValueError:
+        return None
+
+
+user_filter = UserFilter()
+
+
+def init_user_filter(app: Flask):
+    user_filter.init_app(app)
@@ -4,17 +4,20 @@ from abc import abstractmethod
 from http import HTTPStatus
 
 from flask import current_app, jsonify, redirect, request, url_for
-from flask_jwt_extended import (create_access_token, create_refresh_token,
-                                get_jwt_identity)
+from flask_jwt_extended import get_jwt, get_jwt_identity
 from marshmallow import ValidationError
 from rauth import OAuth2Service
 from werkzeug.exceptions import abort
 
 from db.pg_db import db
 from models.accounts import User
-from models.rbac import Role
 from notify_grpc.send_register_event import send_register_notification
 from schemas.accounts import UserLoginSchema
+from services.request_context import get_request_context
+from services.role_cache import role_cache
+from services.tokens import create_tokens, has_role
+from services.user_cache import user_cache
+from services.user_filter import UserFilter
 
 
 # def register_user(login, password, email=None, superuser=False):
@@ -26,7 +29,7 @@ def register_user(login, password, email=None, request_id=None, superuser=False)
             jsonify({'status': 'error', 'message': e.messages}),
             HTTPStatus.BAD_REQUEST,
         )
-    if User.query.filter_by(login=login).first():
+    if user_cache.get_by_login(login):
         return (
             jsonify(
                 {
@@ -37,15 +40,16 @@ def register_user(login, password, email=None, request_id=None, superuser=False)
             HTTPStatus.BAD_REQUEST,
         )
     if superuser:
-        role_id = Role.query.filter_by(name='Admin').first().id
+        role_id = role_cache.get_by_name('Admin').id
     else:
-        role_id = Role.query.filter_by(name='BaseUser').first().id
+        role_id = role_cache.get_by_name('BaseUser').id
     user = User(login=login, email=email, role_id=role_id)
     user.set_password(password)
     db.session.add(user)
     db.session.commit()
-    access_token = create_access_token(identity=login)
-    refresh_token = create_refresh_token(identity=login)
+    user_cache.invalidate(user.id, user.login)
+    UserFilter.publish_created(user.id)
+    access_token, refresh_token = create_tokens(user)
 
     notified = None
     if email:
@@ -69,8 +73,7 @@ def check_role(required_role: str):
     def check_admin_inner(f):
         @functools.wraps(f)
         def wrapper(*args, **kwargs):
-            login = get_jwt_identity()
-            if not User.check_permission(login=login, required_role=required_role):
+            if not has_role(get_jwt(), required_role):
                 abort(HTTPStatus.FORBIDDEN)
             return f(*args, **kwargs)
 
@@ -81,7 +84,7 @@ def check_role(required_role: str):
 
 def get_login_and_user_or_403():
     login = get_jwt_identity()
-    user = User.query.filter_by(login=login).first()
+    user = get_request_context().user
     if not user:
         abort(HTTPStatus.FORBIDDEN)
     return login, user
@@ -21,6 +21,8 @@ def must_not_be_blank(data):
 
 
 def validate_role_name(name):
+    # Проверка идет по таблице, а не по кешу ролей: роль могла быть создана
+    # в другом воркере, который еще не обновил свою копию
     if Role.query.filter_by(name=name).first():
         raise ValidationError("Роль с такими именем уже существует")
 
@@ -1,14 +1,19 @@
 import asyncio
+import ipaddress
+import random
+import uuid
 from dataclasses import dataclass
 from urllib.parse import urljoin
 
+import grpc
 import pytest
 import aiohttp
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, text
 from sqlalchemy.ext.automap import automap_base
 from sqlalchemy.future import create_engine
 from sqlalchemy.orm import scoped_session, sessionmaker, declarative_base
 
+import auth_pb2_grpc
 from settings import Settings
 from multidict import CIMultiDictProxy
 
@@ -77,6 +82,20 @@ async def session():
     await session.close()
 
 
+@pytest.fixture
+def client_headers():
+    """
+    Заголовки запроса от нового IP клиента, чтобы лимиты и блокировки по IP
+    не пересекались между тестами и запусками. Приложение доверяет
+    X-Forwarded-For прокси, в docker-compose.test.yaml его роль играют тесты.
+    """
+    def inner(**headers) -> dict:
+        ip = ipaddress.IPv4Address(10 << 24 | random.getrandbits(24))
+        return {"X-Request-Id": str(uuid.uuid4()), "X-Forwarded-For": str(ip), **headers}
+
+    return inner
+
+
 @pytest.fixture
 def make_get_request(session):
     async def inner(method: str, headers: dict = None, params: dict = None) -> HTTPResponse:
@@ -120,3 +139,42 @@ def make_delete_request(session):
             )
 
     return inner
+
+
+@pytest.fixture
+async def admin_token(db_setup, db_session, make_post_request, client_headers):
+    """Токен пользователя с ролью Admin (роль назначается в БД до входа)."""
+    credentials = {"login": "Admin", "password": "Testtest123"}
+    await make_post_request("/api/v1/accounts/register", json_data=credentials, headers=client_headers())
+    db_session.execute(
+        text('UPDATE "user" SET role_id = (SELECT id FROM role WHERE name = \'Admin\') WHERE login = :login'),
+        {"login": credentials["login"]},
+    )
+    db_session.commit()
+    response = await make_post_request("/api/v1/accounts/login", json_data=credentials, headers=client_headers())
+    return response.body["access_token"]
+
+
+@pytest.fixture(scope='session')
+def auth_stub():
+    with grpc.insecure_channel(f'{config.grpc_host}:{config.grpc_port}') as channel:
+        yield auth_pb2_grpc.AuthStub(channel)
+
+
+async def eventually(check, timeout: float = 3) -> bool:
+    """
+    Ждет, пока check() станет истинным: изменения доходят до процессов через
+    pub/sub. check может быть корутинной функцией.
+    """
+    deadline = asyncio.get_event_loop().time() + timeout
+    while not await _resolve(check()):
+        if asyncio.get_event_loop().time() > deadline:
+            return False
+        await asyncio.sleep(0.1)
+    return True
+
+
+async def _resolve(result):
+    if asyncio.iscoroutine(result):
+        return await result
+    return result
@@ -10,7 +10,14 @@ class Settings(BaseSettings):
 
     redis_host: str = Field('http://127.0.0.1', env='REDIS_HOST')
     redis_port: str = Field('6379', env='REDIS_PORT')
+    redis_db: str = Field('0', env='REDIS_DB')
 
     app_host: str = Field('http://127.0.0.1', env='APP_HOST')
     app_port: str = Field('8000', env='APP_PORT')
 
+    grpc_host: str = Field('auth-grpc', env='GRPC_HOST')
+    grpc_port: str = Field('50051', env='GRPC_PORT')
+    auth_changes_sync_watchers: int = Field(2, env='AUTH_CHANGES_SYNC_WATCHERS')
+
+    jwt_secret_key: str = Field('', env='JWT_SECRET_KEY')
+    jwt_algorithm: str = Field('', env='JWT_ALGORITHM')
@@ -0,0 +1,125 @@
+import pytest
+from sqlalchemy import text
+
+import auth_pb2
+from conftest import eventually
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def access_token(db_setup, make_post_request, client_headers):
+    response = await make_post_request(f"/api/v1/accounts/register",
+                                       json_data={"login": "Test", "password": "Testtest123"},
+                                       headers=client_headers())
+    return response.body["access_token"]
+
+
+def check_role(auth_stub, token: str, role: str):
+    return auth_stub.CheckRole(auth_pb2.CheckRoleRequest(access_token=token, roles=[role]))
+
+
+async def test_check_role(access_token, auth_stub):
+    # Повторная проверка отвечает из кеша тем же решением
+    for _ in range(2):
+        response = check_role(auth_stub, access_token, "BaseUser")
+        assert response.result
+        assert response.status == "Success"
+
+    response = check_role(auth_stub, access_token, "Admin")
+
+    assert not response.result
+    assert response.status == "Success"
+
+
+async def test_check_role_rejects_bad_signature(access_token, auth_stub):
+    header, payload, signature = access_token.split(".")
+    forged = f"{header}.{payload}.{signature[::-1]}"
+
+    response = check_role(auth_stub, forged, "BaseUser")
+
+    assert not response.result
+    assert response.status == "Error"
+
+
+async def test_cached_decision_dropped_on_revoke(access_token, auth_stub, make_post_request, client_headers):
+    assert check_role(auth_stub, access_token, "BaseUser").result
+
+    await make_post_request(f"/api/v1/accounts/logout",
+                            headers=client_headers(Authorization=f"Bearer {access_token}"))
+
+    assert await eventually(lambda: check_role(auth_stub, access_token, "BaseUser").status == "Error")
+
+
+async def test_cached_decision_dropped_on_role_change(access_token, auth_stub, db_session):
+    user_id = db_session.execute(text('SELECT id FROM "user" WHERE login = :login'), {"login": "Test"}).scalar()
+    assert check_role(auth_stub, access_token, "BaseUser").result
+
+    response = auth_stub.SetRole(auth_pb2.SetRoleRequest(uuid=str(user_id), role="SubscribeUser"))
+    assert response.result
+
+    # Токен выпущен до смены роли и больше не принимается
+    assert await eventually(lambda: check_role(auth_stub, access_token, "BaseUser").status == "Error")
+
+
+@pytest.fixture
+async def revoked_token(db_setup, make_post_request, auth_stub, client_headers):
+    response = await make_post_request(f"/api/v1/accounts/register",
+                                       json_data={"login": "Revoked", "password": "Testtest123"},
+                                       headers=client_headers())
+    token = response.body["access_token"]
+    await make_post_request(f"/api/v1/accounts/logout",
+                            headers=client_headers(Authorization=f"Bearer {token}"))
+    assert await eventually(lambda: check_role(auth_stub, token, "BaseUser").status == "Error")
+    return token
+
+
+def batch_request(checks):
+    return auth_pb2.CheckRoleBatchRequest(
+        checks=[auth_pb2.CheckRoleRequest(access_token=token, roles=[role]) for token, role in checks]
+    )
+
+
+def outcomes(response):
+    return [(result.result, result.status) for result in response.results]
+
+
+async def test_check_role_batch(access_token, revoked_token, auth_stub):
+    response = auth_stub.CheckRoleBatch(batch_request([
+        (access_token, "BaseUser"),
+        (access_token, "Admin"),
+        (revoked_token, "BaseUser"),
+        ("not-a-token", "BaseUser"),
+    ]))
+
+    assert outcomes(response) == [
+        (True, "Success"),
+        (False, "Success"),
+        (False, "Error"),
+        (False, "Error"),
+    ]
+
+
+async def test_check_role_batch_keeps_order(access_token, auth_stub):
+    # Одинаковые проверки в пачке отвечают каждая на своем месте
+    roles = ["BaseUser", "Admin", "Admin", "BaseUser", "SubscribeUser", "BaseUser"] * 5
+    response = auth_stub.CheckRoleBatch(batch_request([(access_token, role) for role in roles]))
+
+    assert [result.result for result in response.results] == [role == "BaseUser" for role in roles]
+
+
+async def test_check_role_stream(access_token, revoked_token, auth_stub):
+    requests = [
+        batch_request([(access_token, "BaseUser"), (revoked_token, "BaseUser")]),
+        batch_request([(access_token, "Admin")]),
+        batch_request([("not-a-token", "BaseUser"), (access_token, "BaseUser"), (access_token, "Admin")]),
+    ]
+
+    responses = list(auth_stub.CheckRoleStream(iter(requests)))
+
+    # Ответ на каждую пачку - в порядке пачек и проверок внутри них
+    assert [outcomes(response) for response in responses] == [
+        [(True, "Success"), (False, "Error")],
+        [(False, "Success")],
+        [(False, "Error"), (True, "Success"), (False, "Success")],
+    ]
@@ -0,0 +1,47 @@
+import uuid
+
+import pytest
+from sqlalchemy import text
+
+import auth_pb2
+from conftest import eventually
+
+pytestmark = pytest.mark.asyncio
+
+
+def user_exists(auth_stub, user_id: str) -> bool:
+    return auth_stub.CheckUserExists(auth_pb2.CheckUserExistsRequest(uuid=user_id)).result
+
+
+async def test_unknown_user(auth_stub):
+    assert not user_exists(auth_stub, str(uuid.uuid4()))
+
+
+async def test_invalid_user_id(auth_stub):
+    assert not user_exists(auth_stub, "not-a-uuid")
+
+
+async def test_registered_user(db_setup, db_session, auth_stub, make_post_request, client_headers):
+    await make_post_request(f"/api/v1/accounts/register",
+                            json_data={"login": "Test", "password": "Testtest123"},
+                            headers=client_headers())
+    user_id = db_session.execute(text('SELECT id FROM "user" WHERE login = :login'), {"login": "Test"}).scalar()
+
+    # Новый пользователь доходит до фильтра через pub/sub
+    assert await eventually(lambda: user_exists(auth_stub, str(user_id)))
+    # Id в другом регистре - тот же пользователь
+    assert user_exists(auth_stub, str(user_id).upper())
+
+
+async def test_deleted_user(db_setup, db_session, auth_stub, make_post_request, client_headers):
+    await make_post_request(f"/api/v1/accounts/register",
+                            json_data={"login": "Test", "password": "Testtest123"},
+                            headers=client_headers())
+    user_id = db_session.execute(text('SELECT id FROM "user" WHERE login = :login'), {"login": "Test"}).scalar()
+    assert await eventually(lambda: user_exists(auth_stub, str(user_id)))
+
+    db_session.execute(text('DELETE FROM "user" WHERE id = :id'), {"id": user_id})
+    db_session.commit()
+
+    # Положительный ответ фильтра подтверждается запросом в БД
+    assert not user_exists(auth_stub, str(user_id))
@@ -0,0 +1,143 @@
+import itertools
+import time
+
+import grpc
+import pytest
+import redis
+from sqlalchemy import text
+
+import auth_pb2
+from settings import Settings
+
+config = Settings()
+
+pytestmark = pytest.mark.asyncio
+
+STREAM = "auth_changes"
+# Подписка синхронного сервера освобождает слот после текущего чтения
+# журнала (AUTH_CHANGES_BLOCK_MS), поэтому новые подписки ждут дольше него
+SUBSCRIBE_TIMEOUT = 10
+
+
+@pytest.fixture(scope="module")
+def redis_client():
+    client = redis.Redis(host=config.redis_host, port=int(config.redis_port), db=int(config.redis_db or 0))
+    yield client
+    client.close()
+
+
+@pytest.fixture
+async def user_id(db_setup, db_session, make_post_request, client_headers):
+    await make_post_request(f"/api/v1/accounts/register",
+                            json_data={"login": "Test", "password": "Testtest123"},
+                            headers=client_headers())
+    return str(db_session.execute(text('SELECT id FROM "user" WHERE login = :login'), {"login": "Test"}).scalar())
+
+
+@pytest.fixture
+def watches():
+    """Открытые подписки, отменяются после теста."""
+    calls = []
+    yield calls
+    for call in calls:
+        call.cancel()
+
+
+def last_id(redis_client) -> str:
+    events = redis_client.xrevrange(STREAM, count=1)
+    return events[0][0].decode() if events else "0-0"
+
+
+def assign_roles(auth_stub, user_id: str, roles: list):
+    for role in roles:
+        assert auth_stub.SetRole(auth_pb2.SetRoleRequest(uuid=user_id, role=role)).result
+
+
+def subscribe(auth_stub, watches: list, offset: str):
+    """Подписка и ее первое событие, пока слоты синхронного сервера заняты - повторяет."""
+    deadline = time.monotonic() + SUBSCRIBE_TIMEOUT
+    while True:
+        call = auth_stub.WatchAuthChanges(auth_pb2.WatchAuthChangesRequest(offset=offset),
+                                          timeout=SUBSCRIBE_TIMEOUT * 2)
+        try:
+            first = next(call)
+        except grpc.RpcError as e:
+            if e.code() != grpc.StatusCode.RESOURCE_EXHAUSTED or time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+            continue
+        watches.append(call)
+        return call, first
+
+
+def role_assignments(call, first, user_id: str, count: int) -> list:
+    """Первые count назначений ролей пользователю, остальные события пропускаются."""
+    events = (event for event in itertools.chain([first], call)
+              if event.type == auth_pb2.AuthChange.ROLE_ASSIGNED and user_id in event.user_ids)
+    return list(itertools.islice(events, count))
+
+
+def sequence(event) -> tuple:
+    return tuple(int(part) for part in event.sequence.split("-"))
+
+
+async def test_watch_resumes_from_offset(user_id, auth_stub, redis_client, watches):
+    offset = last_id(redis_client)
+    assign_roles(auth_stub, user_id, ["SubscribeUser", "BaseUser"])
+
+    call, first = subscribe(auth_stub, watches, offset)
+
+    assert first.type != auth_pb2.AuthChange.RESYNC
+    events = role_assignments(call, first, user_id, 2)
+    assert [event.role_name for event in events] == ["SubscribeUser", "BaseUser"]
+    assert sequence(events[0]) < sequence(events[1])
+
+    # Переподключение с sequence полученного события продолжает со следующего
+    call, first = subscribe(auth_stub, watches, events[0].sequence)
+
+    assert first.type != auth_pb2.AuthChange.RESYNC
+    resumed = role_assignments(call, first, user_id, 1)
+    assert resumed[0].sequence == events[1].sequence
+    assert resumed[0].role_name == "BaseUser"
+
+
+async def test_watch_resync_after_trim(user_id, auth_stub, redis_client, watches):
+    offset = last_id(redis_client)
+    assign_roles(auth_stub, user_id, ["SubscribeUser", "BaseUser"])
+    # События после offset вытеснены из журнала
+    redis_client.xtrim(STREAM, maxlen=1, approximate=False)
+    remaining = last_id(redis_client)
+
+    _, first = subscribe(auth_stub, watches, offset)
+
+    assert first.type == auth_pb2.AuthChange.RESYNC
+    assert first.sequence == remaining
+
+
+async def test_watch_future_offset_resyncs(auth_stub, redis_client, watches):
+    _, first = subscribe(auth_stub, watches, "99999999999999-0")
+
+    assert first.type == auth_pb2.AuthChange.RESYNC
+    assert first.sequence == last_id(redis_client)
+
+
+async def test_watch_invalid_offset(auth_stub, redis_client):
+    # Проверка offset не зависит от содержимого журнала
+    redis_client.delete(STREAM)
+
+    with pytest.raises(grpc.RpcError) as error:
+        subscribe(auth_stub, [], "not-an-offset")
+
+    assert error.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+
+
+async def test_sync_watchers_cap(auth_stub, watches):
+    # Каждая подписка сразу получает RESYNC и занимает поток сервера
+    for _ in range(config.auth_changes_sync_watchers):
+        subscribe(auth_stub, watches, "99999999999999-0")
+
+    call = auth_stub.WatchAuthChanges(auth_pb2.WatchAuthChangesRequest(offset="99999999999999-0"), timeout=5)
+    with pytest.raises(grpc.RpcError) as error:
+        next(call)
+
+    assert error.value.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
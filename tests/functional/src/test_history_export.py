@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from urllib.parse import urljoin
+
+import pytest
+from sqlalchemy import text
+
+from conftest import SERVICE_URL
+
+pytestmark = pytest.mark.asyncio
+
+EXPORT_URL = "/api/v1/accounts/history/export"
+EXPORT_FIELDS = ["id", "user_id", "date", "user_device_type", "user_agent", "info"]
+
+
+@pytest.fixture
+async def user_history(db_setup, db_session, make_post_request, client_headers):
+    """Токен и id пользователя, его записи истории (info по возрастанию даты) и запись другого пользователя."""
+    response = await make_post_request(f"/api/v1/accounts/register",
+                                       json_data={"login": "Test", "password": "Testtest123"},
+                                       headers=client_headers())
+    user_id = str(db_session.execute(text('SELECT id FROM "user" WHERE login = :login'), {"login": "Test"}).scalar())
+    other_id = str(db_session.execute(text('SELECT id FROM "user" WHERE login = :login'), {"login": "Testtest"}).scalar())
+    now = datetime.utcnow().replace(microsecond=0)
+    rows = [(user_id, now - timedelta(minutes=index), f"GET /row/{index}", device)
+            for index, device in enumerate(["web", "mobile", "smart"])]
+    rows.append((other_id, now, "GET /other", "web"))
+    for row_user_id, date, info, device in rows:
+        db_session.execute(
+            text(
+                "INSERT INTO users_sign_in (id, user_id, user_agent, date, info, user_device_type) "
+                "VALUES (:id, :user_id, 'pytest', :date, :info, :device)"
+            ),
+            {"id": str(uuid.uuid4()), "user_id": row_user_id, "date": date, "info": info, "device": device},
+        )
+    db_session.commit()
+    expected = [info for row_user_id, date, info, _ in sorted(rows, key=lambda row: row[1]) if row_user_id == user_id]
+    return response.body["access_token"], user_id, expected
+
+
+@pytest.fixture
+def export(session, client_headers):
+    async def inner(token: str, params: dict):
+        async with session.get(urljoin(SERVICE_URL, EXPORT_URL),
+                               headers=client_headers(Authorization=f"Bearer {token}"),
+                               params=params) as response:
+            return response.status, response.headers, await response.text()
+
+    return inner
+
+
+async def test_export_ndjson(user_history, admin_token, export):
+    _, user_id, expected = user_history
+    status, headers, body = await export(admin_token, {"user_id": user_id})
+
+    assert status == HTTPStatus.OK
+    assert headers["Content-Type"].startswith("application/x-ndjson")
+    assert headers["Content-Disposition"] == "attachment; filename=history.ndjson"
+    records = [json.loads(line) for line in body.splitlines()]
+    assert [record["info"] for record in records] == expected
+    assert all(list(record) == EXPORT_FIELDS for record in records)
+    assert {record["user_id"] for record in records} == {user_id}
+
+
+async def test_export_csv(user_history, admin_token, export):
+    _, user_id, expected = user_history
+    status, headers, body = await export(admin_token, {"user_id": user_id, "format": "csv"})
+
+    assert status == HTTPStatus.OK
+    assert headers["Content-Type"].startswith("text/csv")
+    header, *rows = list(csv.reader(io.StringIO(body)))
+    assert header == EXPORT_FIELDS
+    assert [row[EXPORT_FIELDS.index("info")] for row in rows] == expected
+    assert {row[EXPORT_FIELDS.index("user_id")] for row in rows} == {user_id}
+
+
+async def test_export_date_filter(user_history, admin_token, export):
+    _, user_id, expected = user_history
+    date_from = (datetime.utcnow() - timedelta(seconds=30)).isoformat()
+    status, _, body = await export(admin_token, {"user_id": user_id, "date_from": date_from})
+
+    assert status == HTTPStatus.OK
+    assert [json.loads(line)["info"] for line in body.splitlines()] == expected[-1:]
+
+
+async def test_export_requires_admin(user_history, export, make_get_request, client_headers):
+    token, user_id, _ = user_history
+    # Обычный пользователь не выгружает историю, даже свою
+    status, _, body = await export(token, {"user_id": user_id})
+
+    assert status == HTTPStatus.FORBIDDEN
+    assert json.loads(body) == {"status": "error", "message": "Ошибка доступа"}
+
+    response = await make_get_request(EXPORT_URL, headers=client_headers())
+
+    assert response.status == HTTPStatus.UNAUTHORIZED
+
+
+async def test_export_invalid_format(admin_token, export):
+    status, _, body = await export(admin_token, {"format": "xml"})
+
+    assert status == HTTPStatus.BAD_REQUEST
+    assert "format" in json.loads(body)["message"]
@@ -0,0 +1,105 @@
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from services.history_partitions import (add_months, create_month_partition,
+                                         current_month, default_partition,
+                                         drop_expired_partitions,
+                                         month_partition,
+                                         purge_default_partitions)
+
+DEVICE = "web"
+
+
+@pytest.fixture(scope="module")
+def engine(db_engine):
+    # Функции обслуживания, как и в приложении, передают SQL строками,
+    # а future engine из conftest принимает только text()
+    engine = create_engine(db_engine.url)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def history_row(engine):
+    """Добавляет строку истории за месяц, возвращает ее id."""
+    ids = []
+
+    def inner(month) -> str:
+        row_id = str(uuid.uuid4())
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    "INSERT INTO users_sign_in (id, user_agent, date, info, user_device_type) "
+                    "VALUES (:id, 'pytest', :date, 'GET /test', :device)"
+                ),
+                {"id": row_id, "date": month.replace(day=15), "device": DEVICE},
+            )
+        ids.append(row_id)
+        return row_id
+
+    yield inner
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM users_sign_in WHERE id = ANY(:ids)"), {"ids": ids})
+
+
+def find_row(engine, table: str, row_id: str) -> bool:
+    with engine.connect() as connection:
+        return connection.execute(
+            text(f'SELECT EXISTS (SELECT 1 FROM "{table}" WHERE id = :id)'), {"id": row_id}
+        ).scalar()
+
+
+def drop_partition(engine, name: str):
+    with engine.begin() as connection:
+        connection.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+
+
+def test_month_partition_takes_default_rows(engine, history_row):
+    # Месяц без партиции: строка попадает в DEFAULT
+    month = add_months(current_month(), 36)
+    name = month_partition(DEVICE, month)
+    row_id = history_row(month)
+    assert find_row(engine, default_partition(DEVICE), row_id)
+
+    try:
+        with engine.begin() as connection:
+            create_month_partition(connection, DEVICE, month)
+
+        assert find_row(engine, name, row_id)
+        assert not find_row(engine, default_partition(DEVICE), row_id)
+        # DEFAULT снова подключена и принимает строки
+        assert find_row(engine, default_partition(DEVICE), history_row(add_months(month, 1)))
+    finally:
+        drop_partition(engine, name)
+
+
+def test_expired_partitions_dropped(engine, history_row):
+    month = add_months(current_month(), -36)
+    name = month_partition(DEVICE, month)
+    with engine.begin() as connection:
+        create_month_partition(connection, DEVICE, month)
+    history_row(month)
+
+    try:
+        with engine.begin() as connection:
+            expired = drop_expired_partitions(connection, retention=12, detach_only=False)
+
+        assert name in expired
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is None
+    finally:
+        drop_partition(engine, name)
+
+
+def test_expired_default_rows_purged(engine, history_row):
+    old_row = history_row(add_months(current_month(), -36))
+    future_row = history_row(add_months(current_month(), 36))
+
+    with engine.begin() as connection:
+        purged = purge_default_partitions(connection, retention=12)
+
+    assert purged[default_partition(DEVICE)] >= 1
+    assert not find_row(engine, default_partition(DEVICE), old_row)
+    assert find_row(engine, default_partition(DEVICE), future_row)
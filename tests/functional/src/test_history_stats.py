@@ -0,0 +1,96 @@
+from collections import Counter
+from datetime import datetime
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import text
+
+from conftest import eventually
+
+pytestmark = pytest.mark.asyncio
+
+STATS_URL = "/api/v1/accounts/history/stats"
+DEVICES = ["web", "web", "mobile"]
+
+
+@pytest.fixture
+async def user_token(db_setup, db_session, make_post_request, client_headers):
+    response = await make_post_request(f"/api/v1/accounts/register",
+                                       json_data={"login": "Test", "password": "Testtest123"},
+                                       headers=client_headers())
+    user_id = str(db_session.execute(text('SELECT id FROM "user" WHERE login = :login'), {"login": "Test"}).scalar())
+    return response.body["access_token"], user_id
+
+
+def device_counts(db_session, day) -> Counter:
+    rows = db_session.execute(
+        text("SELECT user_device_type, count FROM users_sign_in_device_stats WHERE day = :day"), {"day": day}
+    )
+    return Counter(dict(rows.all()))
+
+
+def user_counts(db_session, user_id: str) -> dict:
+    rows = db_session.execute(
+        text("SELECT day, count FROM users_sign_in_user_stats WHERE user_id = :user_id"), {"user_id": user_id}
+    )
+    return dict(rows.all())
+
+
+def rebuilt_user_counts(db_session, user_id: str) -> dict:
+    # Тот же подсчет, что делает rebuild_stats по самой истории
+    rows = db_session.execute(
+        text("SELECT date::date, count(*) FROM users_sign_in WHERE user_id = :user_id GROUP BY date::date"),
+        {"user_id": user_id},
+    )
+    return dict(rows.all())
+
+
+@pytest.fixture
+async def user_activity(user_token, db_session, make_get_request, client_headers):
+    """Запросы с User-Device: писатель истории пишет их и обновляет агрегаты."""
+    token, user_id = user_token
+    today = datetime.utcnow().date()
+    devices_before = device_counts(db_session, today)
+    for device in DEVICES:
+        response = await make_get_request(f"/api/v1/accounts/account",
+                                          headers=client_headers(**{"Authorization": f"Bearer {token}",
+                                                                    "User-Device": device}))
+        assert response.status == HTTPStatus.OK
+
+    assert await eventually(lambda: user_counts(db_session, user_id).get(today) == len(DEVICES))
+    return user_id, today, devices_before
+
+
+async def test_writer_updates_rollups(user_activity, db_session):
+    user_id, today, devices_before = user_activity
+
+    assert device_counts(db_session, today) - devices_before == Counter(DEVICES)
+    # Агрегаты, накопленные писателем, совпадают с пересчетом по истории
+    assert user_counts(db_session, user_id) == rebuilt_user_counts(db_session, user_id)
+
+
+async def test_stats_endpoint(user_activity, admin_token, make_get_request, client_headers):
+    user_id, today, _ = user_activity
+    response = await make_get_request(STATS_URL,
+                                      headers=client_headers(Authorization=f"Bearer {admin_token}"),
+                                      params={"user_id": user_id})
+
+    assert response.status == HTTPStatus.OK
+    assert response.body["data"] == {"days": [{"day": today.isoformat(), "count": len(DEVICES)}]}
+
+    response = await make_get_request(STATS_URL, headers=client_headers(Authorization=f"Bearer {admin_token}"))
+
+    assert response.status == HTTPStatus.OK
+    devices = {item["user_device_type"] for item in response.body["data"]["devices"]
+               if item["day"] == today.isoformat()}
+    assert set(DEVICES) <= devices
+    active = [item["users"] for item in response.body["data"]["active_users"] if item["day"] == today.isoformat()]
+    assert active and active[0] >= 1
+
+
+async def test_stats_requires_admin(user_token, make_get_request, client_headers):
+    token, _ = user_token
+    response = await make_get_request(STATS_URL, headers=client_headers(Authorization=f"Bearer {token}"))
+
+    assert response.status == HTTPStatus.FORBIDDEN
+    assert response.body == {"status": "error", "message": "Ошибка доступа"}
@@ -0,0 +1,46 @@
+from http import HTTPStatus
+
+import jwt
+import pytest
+
+from settings import Settings
+
+config = Settings()
+
+pytestmark = pytest.mark.asyncio
+
+JWKS_URL = "/.well-known/jwks.json"
+
+
+async def test_jwks_cache_headers(make_get_request, client_headers):
+    response = await make_get_request(JWKS_URL, headers=client_headers())
+
+    assert response.status == HTTPStatus.OK
+    assert isinstance(response.body["keys"], list)
+    etag = response.headers["ETag"]
+    assert etag
+    cache_control = response.headers["Cache-Control"]
+    assert "public" in cache_control
+    assert "max-age=" in cache_control
+
+    # Набор ключей не менялся - клиент продолжает пользоваться своей копией
+    response = await make_get_request(JWKS_URL, headers=client_headers(**{"If-None-Match": etag}))
+
+    assert response.status == HTTPStatus.NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+
+
+@pytest.mark.skipif((config.jwt_algorithm or "HS256") == "HS256",
+                    reason="при HS256 набор ключей пуст")
+async def test_token_kid_in_jwks(db_setup, make_post_request, make_get_request, client_headers):
+    response = await make_post_request(f"/api/v1/accounts/register",
+                                       json_data={"login": "Test", "password": "Testtest123"},
+                                       headers=client_headers())
+    header = jwt.get_unverified_header(response.body["access_token"])
+
+    response = await make_get_request(JWKS_URL, headers=client_headers())
+    keys = {key["kid"]: key for key in response.body["keys"]}
+
+    assert header["kid"] in keys
+    assert keys[header["kid"]]["alg"] == header["alg"] == config.jwt_algorithm
+    assert keys[header["kid"]]["use"] == "sig"
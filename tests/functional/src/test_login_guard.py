@@ -0,0 +1,53 @@
+import uuid
+from http import HTTPStatus
+
+import pytest
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def user(db_setup, make_post_request, client_headers):
+    # Счетчики ошибок входа живут в Redis дольше теста - логин каждый раз новый
+    login = f"Guard{uuid.uuid4().hex[:8]}"
+    password = "Testtest123"
+    await make_post_request(f"/api/v1/accounts/register",
+                            json_data={"login": login, "password": password},
+                            headers=client_headers())
+    return login, password
+
+
+async def test_login_locked_after_failures(user, make_post_request, client_headers):
+    login, password = user
+    # Ошибки с разных IP копятся на логине
+    for _ in range(5):
+        response = await make_post_request(f"/api/v1/accounts/login",
+                                           json_data={"login": login, "password": "Wrongpass123"},
+                                           headers=client_headers())
+        assert response.status == HTTPStatus.FORBIDDEN
+
+    response = await make_post_request(f"/api/v1/accounts/login",
+                                       json_data={"login": login, "password": password},
+                                       headers=client_headers())
+
+    assert response.status == HTTPStatus.TOO_MANY_REQUESTS
+    assert response.body["message"] == "Слишком много неудачных попыток входа, попробуйте позже"
+    assert int(response.headers["Retry-After"]) > 0
+
+
+async def test_success_resets_failures(user, make_post_request, client_headers):
+    login, password = user
+    for _ in range(4):
+        await make_post_request(f"/api/v1/accounts/login",
+                                json_data={"login": login, "password": "Wrongpass123"},
+                                headers=client_headers())
+    response = await make_post_request(f"/api/v1/accounts/login",
+                                       json_data={"login": login, "password": password},
+                                       headers=client_headers())
+    assert response.status == HTTPStatus.OK
+
+    response = await make_post_request(f"/api/v1/accounts/login",
+                                       json_data={"login": login, "password": "Wrongpass123"},
+                                       headers=client_headers())
+
+    assert response.status == HTTPStatus.FORBIDDEN
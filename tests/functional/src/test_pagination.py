@@ -0,0 +1,73 @@
+import uuid
+from datetime import datetime, timedelta
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import text
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def user_history(db_setup, db_session, make_post_request, client_headers):
+    """Токен пользователя и его история: info записей в порядке выдачи."""
+    response = await make_post_request(f"/api/v1/accounts/register",
+                                       json_data={"login": "Test", "password": "Testtest123"},
+                                       headers=client_headers())
+    user_id = db_session.execute(text('SELECT id FROM "user" WHERE login = :login'), {"login": "Test"}).scalar()
+    now = datetime.utcnow().replace(microsecond=0)
+    # Записи с одинаковой датой упорядочиваются по id
+    dates = [now, now, now - timedelta(minutes=1), now - timedelta(minutes=2), now - timedelta(minutes=2)]
+    rows = []
+    for index, date in enumerate(dates):
+        row = (date, str(uuid.uuid4()), f"GET /row/{index}")
+        db_session.execute(
+            text(
+                "INSERT INTO users_sign_in (id, user_id, user_agent, date, info, user_device_type) "
+                "VALUES (:id, :user_id, 'pytest', :date, :info, 'web')"
+            ),
+            {"id": row[1], "user_id": user_id, "date": row[0], "info": row[2]},
+        )
+        rows.append(row)
+    db_session.commit()
+    return response.body["access_token"], [info for _, _, info in sorted(rows, reverse=True)]
+
+
+async def test_history_pages_follow_cursor(user_history, make_get_request, client_headers):
+    token, expected = user_history
+    infos = []
+    params = {"count": 2}
+    while True:
+        response = await make_get_request(f"/api/v1/accounts/user-history",
+                                          headers=client_headers(Authorization=f"Bearer {token}"),
+                                          params=params)
+        assert response.status == HTTPStatus.OK
+        assert len(response.body["data"]) <= 2
+        assert "total" not in response.body
+        infos.extend(item["info"] for item in response.body["data"])
+        if not response.body["next_cursor"]:
+            break
+        params = {"count": 2, "cursor": response.body["next_cursor"]}
+
+    assert infos == expected
+
+
+async def test_history_total(user_history, make_get_request, client_headers):
+    token, expected = user_history
+    response = await make_get_request(f"/api/v1/accounts/user-history",
+                                      headers=client_headers(Authorization=f"Bearer {token}"),
+                                      params={"count": 10, "with_total": "true"})
+
+    assert response.status == HTTPStatus.OK
+    assert response.body["total"] == len(expected)
+    assert response.body["next_cursor"] is None
+
+
+async def test_history_invalid_cursor(user_history, make_get_request, client_headers):
+    token, _ = user_history
+    response = await make_get_request(f"/api/v1/accounts/user-history",
+                                      headers=client_headers(Authorization=f"Bearer {token}"),
+                                      params={"cursor": "not-a-cursor"})
+
+    assert response.status == HTTPStatus.BAD_REQUEST
+    assert response.body["message"] == {"cursor": ["Некорректный курсор."]}
@@ -0,0 +1,57 @@
+import uuid
+from http import HTTPStatus
+
+import pytest
+from passlib.hash import pbkdf2_sha256
+from sqlalchemy import text
+
+pytestmark = pytest.mark.asyncio
+
+LOGIN = "Pbkdf2User"
+PASSWORD = "Testtest123"
+
+
+@pytest.fixture
+async def pbkdf2_user(db_setup, db_session):
+    # Пользователь с хешем старой схемы
+    db_session.execute(
+        text('INSERT INTO "user" (id, login, password) VALUES (:id, :login, :password)'),
+        {"id": str(uuid.uuid4()), "login": LOGIN, "password": pbkdf2_sha256.hash(PASSWORD)},
+    )
+    db_session.commit()
+
+
+def get_password_hash(db_session) -> str:
+    password_hash = db_session.execute(
+        text('SELECT password FROM "user" WHERE login = :login'), {"login": LOGIN}
+    ).scalar()
+    db_session.commit()
+    return password_hash
+
+
+async def test_login_rehashes_password(pbkdf2_user, db_session, make_post_request, client_headers):
+    assert get_password_hash(db_session).startswith("$pbkdf2-sha256$")
+
+    response = await make_post_request(f"/api/v1/accounts/login",
+                                       json_data={"login": LOGIN, "password": PASSWORD},
+                                       headers=client_headers())
+
+    assert response.status == HTTPStatus.OK
+    assert get_password_hash(db_session).startswith("$argon2")
+
+    # Новый хеш принимает тот же пароль
+    response = await make_post_request(f"/api/v1/accounts/login",
+                                       json_data={"login": LOGIN, "password": PASSWORD},
+                                       headers=client_headers())
+
+    assert response.status == HTTPStatus.OK
+
+
+async def test_wrong_password_keeps_hash(pbkdf2_user, db_session, make_post_request, client_headers):
+    old_hash = get_password_hash(db_session)
+    response = await make_post_request(f"/api/v1/accounts/login",
+                                       json_data={"login": LOGIN, "password": "Wrongpass123"},
+                                       headers=client_headers())
+
+    assert response.status == HTTPStatus.FORBIDDEN
+    assert get_password_hash(db_session) == old_hash
@@ -0,0 +1,55 @@
+from http import HTTPStatus
+
+import pytest
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_rate_limit_headers(make_post_request, db_setup):
+    response = await make_post_request(f"/api/v1/accounts/login",
+                                       json_data={"login": "Testtest", "password": "Testtest123"},
+                                       headers={"X-Request-Id": "test-rate-limit"})
+
+    assert response.status == HTTPStatus.FORBIDDEN
+    assert int(response.headers["X-RateLimit-Limit"]) > 0
+    assert int(response.headers["X-RateLimit-Remaining"]) < int(response.headers["X-RateLimit-Limit"])
+    assert "X-RateLimit-Reset" in response.headers
+    assert "Retry-After" not in response.headers
+
+
+async def test_endpoint_policies(make_post_request, make_get_request, client_headers):
+    headers = client_headers()
+    register = await make_post_request(f"/api/v1/accounts/register",
+                                       json_data={"login": "Testtest1", "password": "123"},
+                                       headers=headers)
+    login = await make_post_request(f"/api/v1/accounts/login", json_data={}, headers=headers)
+    account = await make_get_request(f"/api/v1/accounts/account", headers=headers)
+
+    assert register.status == HTTPStatus.BAD_REQUEST
+    assert register.headers["X-RateLimit-Limit"] == "5"
+    assert login.status == HTTPStatus.BAD_REQUEST
+    assert login.headers["X-RateLimit-Limit"] == "10"
+    assert account.status == HTTPStatus.UNAUTHORIZED
+    assert account.headers["X-RateLimit-Limit"] == "60"
+
+
+async def test_endpoint_burst_exhausted(make_post_request, client_headers):
+    headers = client_headers()
+    for _ in range(3):
+        response = await make_post_request(f"/api/v1/accounts/register",
+                                           json_data={"login": "Testtest1", "password": "123"},
+                                           headers=headers)
+        assert response.status == HTTPStatus.BAD_REQUEST
+
+    response = await make_post_request(f"/api/v1/accounts/register",
+                                       json_data={"login": "Testtest1", "password": "123"},
+                                       headers=headers)
+
+    assert response.status == HTTPStatus.TOO_MANY_REQUESTS
+    assert response.body["message"] == "Слишком много запросов"
+    assert int(response.headers["Retry-After"]) > 0
+
+    # У другого эндпоинта своя корзина
+    response = await make_post_request(f"/api/v1/accounts/login", json_data={}, headers=headers)
+
+    assert response.status == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,80 @@
+import time
+import uuid
+from http import HTTPStatus
+
+import jwt
+import pytest
+
+from settings import Settings
+
+config = Settings()
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+async def tokens(db_setup, make_post_request, client_headers):
+    response = await make_post_request(f"/api/v1/accounts/register",
+                                       json_data={"login": "Test", "password": "Testtest123"},
+                                       headers=client_headers())
+    return response.body["access_token"], response.body["refresh_token"]
+
+
+async def test_refresh_rotates_token(tokens, make_post_request, make_get_request, client_headers):
+    _, refresh_token = tokens
+    response = await make_post_request(f"/api/v1/accounts/refresh",
+                                       headers=client_headers(Authorization=f"Bearer {refresh_token}"))
+
+    assert response.status == HTTPStatus.OK
+    assert response.body["refresh_token"] != refresh_token
+
+    response = await make_get_request(f"/api/v1/accounts/account",
+                                      headers=client_headers(Authorization=f"Bearer {response.body['access_token']}"))
+
+    assert response.status == HTTPStatus.OK
+
+
+async def test_refresh_token_reuse_revokes_family(tokens, make_post_request, make_get_request, client_headers):
+    access_token, refresh_token = tokens
+    response = await make_post_request(f"/api/v1/accounts/refresh",
+                                       headers=client_headers(Authorization=f"Bearer {refresh_token}"))
+    new_access_token = response.body["access_token"]
+    new_refresh_token = response.body["refresh_token"]
+
+    response = await make_post_request(f"/api/v1/accounts/refresh",
+                                       headers=client_headers(Authorization=f"Bearer {refresh_token}"))
+
+    assert response.status == HTTPStatus.UNAUTHORIZED
+    assert response.body["message"] == "Refresh token уже использован, сеанс завершен"
+
+    # Повторное предъявление отзывает все токены семьи
+    response = await make_post_request(f"/api/v1/accounts/refresh",
+                                       headers=client_headers(Authorization=f"Bearer {new_refresh_token}"))
+    assert response.status == HTTPStatus.UNAUTHORIZED
+    for token in (access_token, new_access_token):
+        response = await make_get_request(f"/api/v1/accounts/account",
+                                          headers=client_headers(Authorization=f"Bearer {token}"))
+        assert response.status == HTTPStatus.UNAUTHORIZED
+        assert response.body == {"msg": "Token has been revoked"}
+
+
+@pytest.mark.skipif((config.jwt_algorithm or "HS256") != "HS256",
+                    reason="токен без семьи подписывается JWT_SECRET_KEY")
+async def test_legacy_refresh_token_single_use(tokens, make_post_request, client_headers):
+    # Refresh токен без claim fam, выпущенный до появления семей
+    now = int(time.time())
+    legacy_token = jwt.encode(
+        {"sub": "Test", "type": "refresh", "jti": str(uuid.uuid4()), "iat": now, "nbf": now, "exp": now + 60},
+        config.jwt_secret_key,
+        algorithm="HS256",
+    )
+    response = await make_post_request(f"/api/v1/accounts/refresh",
+                                       headers=client_headers(Authorization=f"Bearer {legacy_token}"))
+
+    assert response.status == HTTPStatus.OK
+
+    response = await make_post_request(f"/api/v1/accounts/refresh",
+                                       headers=client_headers(Authorization=f"Bearer {legacy_token}"))
+
+    assert response.status == HTTPStatus.UNAUTHORIZED
+    assert response.body == {"msg": "Token has been revoked"}
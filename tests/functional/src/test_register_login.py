@@ -5,10 +5,11 @@ import pytest
 pytestmark = pytest.mark.asyncio
 
 
-async def test_register(make_post_request, db_setup):
+async def test_register(make_post_request, db_setup, client_headers):
     login = "Test"
     password = "Testtest123"
-    response = await make_post_request(f"/api/v1/accounts/register", json_data={"login": login, "password": password})
+    response = await make_post_request(f"/api/v1/accounts/register", json_data={"login": login, "password": password},
+                                       headers=client_headers())
 
     assert response.status == HTTPStatus.CREATED
     assert response.body["message"] == "Пользователь Test успешно зарегистрирован"
@@ -17,20 +18,22 @@ async def test_register(make_post_request, db_setup):
     assert response.body["refresh_token"]
 
 
-async def test_not_register_existing_login(make_post_request, db_setup):
+async def test_not_register_existing_login(make_post_request, db_setup, client_headers):
     login = "Testtest"
     password = "Testtest123"
-    response = await make_post_request(f"/api/v1/accounts/register", json_data={"login": login, "password": password})
+    response = await make_post_request(f"/api/v1/accounts/register", json_data={"login": login, "password": password},
+                                       headers=client_headers())
 
     assert response.status == HTTPStatus.BAD_REQUEST
     assert response.body["message"] == "Пользователь с таким login уже зарегистрирован"
     assert response.body["status"] == "error"
 
 
-async def test_not_register_wrong_password(make_post_request, db_setup):
+async def test_not_register_wrong_password(make_post_request, db_setup, client_headers):
     login = "Testtest1"
     password = "123"
-    response = await make_post_request(f"/api/v1/accounts/register", json_data={"login": login, "password": password})
+    response = await make_post_request(f"/api/v1/accounts/register", json_data={"login": login, "password": password},
+                                       headers=client_headers())
 
     assert response.status == HTTPStatus.BAD_REQUEST
     assert response.body["message"]["password"] == [
@@ -38,21 +41,24 @@ async def test_not_register_wrong_password(make_post_request, db_setup):
     ]
 
 
-async def test_register_login(make_post_request, db_setup):
+async def test_register_login(make_post_request, db_setup, client_headers):
     login = "Test"
     password = "Testtest123"
-    await make_post_request(f"/api/v1/accounts/register", json_data={"login": login, "password": password})
-    response = await make_post_request(f"/api/v1/accounts/login", json_data={"login": login, "password": password})
+    await make_post_request(f"/api/v1/accounts/register", json_data={"login": login, "password": password},
+                            headers=client_headers())
+    response = await make_post_request(f"/api/v1/accounts/login", json_data={"login": login, "password": password},
+                                       headers=client_headers())
 
     assert response.status == HTTPStatus.OK
     assert response.body["access_token"]
     assert response.body["refresh_token"]
 
 
-async def test_wrong_password_not_login(make_post_request, db_setup):
+async def test_wrong_password_not_login(make_post_request, db_setup, client_headers):
     login = "Testtest"
     password = "Testtest123"
-    response = await make_post_request(f"/api/v1/accounts/login", json_data={"login": login, "password": password})
+    response = await make_post_request(f"/api/v1/accounts/login", json_data={"login": login, "password": password},
+                                       headers=client_headers())
 
     assert response.status == HTTPStatus.FORBIDDEN
     assert response.body["message"] == "Неверная пара логин-пароль"
@@ -1,33 +1,76 @@
 from http import HTTPStatus
 
+import jwt
 import pytest
 
+from conftest import eventually
+
 pytestmark = pytest.mark.asyncio
 
 
 @pytest.fixture
-async def get_token(db_setup, make_post_request):
+async def get_token(db_setup, make_post_request, client_headers):
     login = "Test"
     password = "paSSword1999"
     await make_post_request(f"/api/v1/accounts/register",
-                            json_data={"login": login, "password": password})
+                            json_data={"login": login, "password": password},
+                            headers=client_headers())
     response = await make_post_request(f"/api/v1/accounts/login",
-                                       json_data={"login": login, "password": password})
+                                       json_data={"login": login, "password": password},
+                                       headers=client_headers())
     return response.body['access_token']
 
 
-async def test_revoke_user_token(get_token, make_delete_request, make_get_request):
+@pytest.fixture
+def is_revoked(make_get_request, client_headers):
+    """Токен отклоняется как отозванный (отзыв доходит до воркеров через pub/sub)."""
+    async def inner(token: str) -> bool:
+        response = await make_get_request(f"/api/v1/accounts/account",
+                                          headers=client_headers(Authorization=f"Bearer {token}"))
+        return (response.status == HTTPStatus.UNAUTHORIZED
+                and response.body == {"msg": "Token has been revoked"})
+
+    return inner
+
+
+async def test_revoke_user_token(get_token, make_post_request, is_revoked, client_headers):
     token = get_token
-    response = await make_delete_request(f"/api/v1/accounts/logout", headers={"Authorization": f"Bearer {token}"})
+    response = await make_post_request(f"/api/v1/accounts/logout",
+                                       headers=client_headers(Authorization=f"Bearer {token}"))
 
     assert response.status == HTTPStatus.OK
     assert response.body['message'] == 'Сеанс пользователя Test успешно завершен'
     assert response.body['status'] == 'success'
 
-    response_after_revoking = await make_get_request(f"/api/v1/accounts/account",
-                                                     headers={"Authorization": f"Bearer {token}"})
+    assert await eventually(lambda: is_revoked(token))
+
+
+async def test_revoke_all_user_tokens(get_token, make_post_request, is_revoked, client_headers):
+    token = get_token
+    response = await make_post_request(f"/api/v1/accounts/logout-all",
+                                       headers=client_headers(Authorization=f"Bearer {token}"))
+
+    assert response.status == HTTPStatus.OK
+    assert response.body['message'] == 'Все сеансы пользователя Test завершены'
+
+    assert await eventually(lambda: is_revoked(token))
+
 
-    assert response_after_revoking.status == HTTPStatus.UNAUTHORIZED
-    assert response_after_revoking.body == {
-        "msg": "Token has been revoked"
-    }
+async def test_password_change_revokes_old_tokens(get_token, make_post_request, make_get_request,
+                                                  is_revoked, client_headers):
+    old_token = get_token
+    response = await make_post_request(f"/api/v1/accounts/account",
+                                       json_data={"password": "Newpass1999"},
+                                       headers=client_headers(Authorization=f"Bearer {old_token}"))
+
+    assert response.status == HTTPStatus.OK
+    new_token = response.body['access_token']
+    # Новые токены выпущены со следующим поколением сессий пользователя
+    old_claims = jwt.decode(old_token, options={"verify_signature": False})
+    new_claims = jwt.decode(new_token, options={"verify_signature": False})
+    assert new_claims['gen'] > old_claims['gen']
+
+    assert await eventually(lambda: is_revoked(old_token))
+    response = await make_get_request(f"/api/v1/accounts/account",
+                                      headers=client_headers(Authorization=f"Bearer {new_token}"))
+    assert response.status == HTTPStatus.OK